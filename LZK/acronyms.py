@@ -0,0 +1,39 @@
+import threading
+import time
+
+from django.apps import apps
+
+from .conf import settings
+
+lock = threading.Lock()
+cache = {"names": None, "expires": 0}
+
+
+def names():
+    """
+    Names of all acronyms by acronym.
+
+    The mapping is loaded once and shared by all threads of the process until
+    it is older than `LZK_ACRONYMS_TIMEOUT` seconds or `invalidate()` is
+    called, which happens whenever a transaction saving or deleting acronyms
+    commits. The timeout bounds how long other processes keep using stale
+    names.
+    """
+    with lock:
+        if cache["names"] is None or cache["expires"] < time.monotonic():
+            model = apps.get_model("LZK", "Acronym")
+            cache["names"] = dict(model.objects.values_list("pk", "name"))
+            cache["expires"] = time.monotonic() + settings.LZK_ACRONYMS_TIMEOUT
+        return cache["names"]
+
+
+def resolve(acronym, default=None):
+    """
+    Name of an acronym, which is matched case insensitively.
+    """
+    return names().get(acronym.strip().upper(), default)
+
+
+def invalidate():
+    with lock:
+        cache["names"] = None
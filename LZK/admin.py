@@ -46,6 +46,12 @@ class UFIDAdmin(VersionAdmin):
     search_fields = ("name",)
 
 
+@admin.register(models.Acronym)
+class AcronymAdmin(VersionAdmin):
+    list_display = ("id", "name")
+    search_fields = ("id", "name")
+
+
 @admin.register(models.StudyField)
 class StudyFieldAdmin(VersionAdmin):
     pass
@@ -1,8 +1,15 @@
 from django.apps import AppConfig
+from django.core.checks import register
 from django.utils.translation import gettext_lazy as _
 
+from .checks import check_search_queue
+
 
 class LZKConfig(AppConfig):
     name = "LZK"
     verbose_name = _("Lernzielkatalog")
     default_auto_field = "django.db.models.BigAutoField"
+
+    def ready(self):
+        super().ready()
+        register()(check_search_queue)
@@ -0,0 +1,15 @@
+from django.core.checks import Error
+
+from .conf import settings
+
+
+def check_search_queue(app_configs, **kwargs):
+    queue = getattr(settings, "LZK_SEARCH_QUEUE", None)
+    if queue and queue not in getattr(settings, "RQ_QUEUES", {}):
+        yield Error(
+            f"Queue {queue} is not configured in RQ_QUEUES",
+            hint="Make sure to define the queue named in settings.LZK_SEARCH_QUEUE "
+            "in settings.RQ_QUEUES.",
+            obj=settings,
+            id=f"{__package__}.E001",
+        )
@@ -4,6 +4,12 @@ from django.conf import settings
 
 class LZKAppConf(AppConf):
     COPYRIGHT = "Some Company"
+    ACRONYMS_TIMEOUT = 300
+    SEARCH_QUEUE = None
+    SEARCH_BATCH_SIZE = 1000
+    AUTOCOMPLETE_LIMIT = 10
+    AUTOCOMPLETE_MIN_LENGTH = 3
+    AUTOCOMPLETE_TIMEOUT = 300
 
     class Meta:
         prefix = "LZK"
@@ -2,11 +2,28 @@ import django_filters
 from crispy_forms.bootstrap import FormActions, StrictButton
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout
+from django import forms
+from django.urls import reverse_lazy as reverse
+from django.utils.text import format_lazy
 from django.utils.translation import gettext as _
 
 from . import models
 
 
+def autocomplete(type):
+    """
+    Text input suggesting the names returned by `AutocompleteView`.
+    """
+    return forms.TextInput(
+        attrs={
+            "autocomplete": "off",
+            "data-autocomplete": format_lazy(
+                "{}?type={}", reverse("autocomplete"), type
+            ),
+        }
+    )
+
+
 class AbilityExtendedFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(lookup_expr="icontains", label=_("Ability"))
 
@@ -41,7 +58,9 @@ class AbilityExtendedFilter(django_filters.FilterSet):
 
 
 class AbilityFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(lookup_expr="icontains", label=_("Ability"))
+    name = django_filters.CharFilter(
+        lookup_expr="icontains", label=_("Ability"), widget=autocomplete("abilities")
+    )
 
     class Meta:
         model = models.Ability
@@ -70,7 +89,9 @@ class AbilityFilter(django_filters.FilterSet):
 
 
 class SymptomFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(lookup_expr="icontains", label=_("Symptom"))
+    name = django_filters.CharFilter(
+        lookup_expr="icontains", label=_("Symptom"), widget=autocomplete("symptoms")
+    )
 
     class Meta:
         model = models.Symptom
@@ -96,7 +117,9 @@ class SymptomFilter(django_filters.FilterSet):
 
 
 class SkillFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(lookup_expr="icontains", label=_("Skill"))
+    name = django_filters.CharFilter(
+        lookup_expr="icontains", label=_("Skill"), widget=autocomplete("skills")
+    )
 
     class Meta:
         model = models.Skill
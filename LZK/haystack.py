@@ -1,20 +1,64 @@
-from django.db.models.signals import m2m_changed, post_delete, post_save
+import logging
+import threading
+
+import django_rq
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from haystack import connections as haystack_connections
+from haystack.backends import BaseEngine, BaseSearchBackend, log_query
+from haystack.backends.simple_backend import SimpleSearchQuery
+from haystack.models import SearchResult
 from haystack.signals import BaseSignalProcessor
+from haystack.utils import get_identifier
+
+from .conf import settings
+from .indexing import labelled, reindex, update_index
+
+logger = logging.getLogger(__name__)
 
 
 class SignalProcessor(BaseSignalProcessor):
+    """
+    Update the search index when indexed objects are saved or deleted.
+
+    Documents also contain the names of many-to-many related objects, like
+    the subjects of an ability, which their index declares in
+    `prefetch_related`. Objects whose relations were changed, from either
+    side, or whose related objects were saved or deleted are reindexed as
+    well. Other relations do not affect the documents and are ignored.
+
+    Changed objects are collected and written to the index in one batch when
+    the transaction commits, see `mark()`. With `LZK_SEARCH_QUEUE` set the
+    batch is written by an RQ worker instead of the committing process.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.local = threading.local()
+        super().__init__(*args, **kwargs)
+
     def setup(self):
         # Naive (listen to all model saves).
         post_save.disconnect(self.handle_save)
         post_delete.disconnect(self.handle_delete)
+        # Indexed model and m2m field by through model.
+        self.relations = dict()
         for using in self.connection_router.for_write():
             indexes = self.connections[using].get_unified_index().get_indexes()
             for model, index in indexes.items():
                 post_save.connect(self.handle_save, sender=model)
                 post_delete.connect(self.handle_delete, sender=model)
-                for related in model._meta.many_to_many:
-                    through = getattr(model, related.get_attname())
+                for name in getattr(index, "prefetch_related", ()):
+                    related = model._meta.get_field(name)
+                    if not related.many_to_many:
+                        continue
+                    through = getattr(model, related.get_attname()).through
+                    self.relations[through] = (model, related)
                     m2m_changed.connect(self.handle_m2m, sender=through)
+                    post_save.connect(self.handle_related, sender=related.related_model)
+                    pre_delete.connect(
+                        self.handle_related, sender=related.related_model
+                    )
         # Efficient would be going through all backends & collecting all models
         # being used, then hooking up signals only for those.
 
@@ -22,8 +66,261 @@ class SignalProcessor(BaseSignalProcessor):
         # Naive (listen to all model saves).
         post_save.disconnect(self.handle_save)
         post_delete.disconnect(self.handle_delete)
+        for through, (model, related) in self.relations.items():
+            m2m_changed.disconnect(self.handle_m2m, sender=through)
+            post_save.disconnect(self.handle_related, sender=related.related_model)
+            pre_delete.disconnect(self.handle_related, sender=related.related_model)
         # Efficient would be going through all backends & collecting all models
         # being used, then disconnecting signals only for those.
 
-    def handle_m2m(self, sender, instance, action, reverse, model, **kwargs):
-        pass
+    def handle_m2m(
+        self, sender, instance, action, reverse, model, pk_set, using, **kwargs
+    ):
+        if action not in ("post_add", "post_remove", "pre_clear"):
+            return
+        if not reverse:
+            self.mark(type(instance), [instance.pk], using)
+        elif action == "pre_clear":
+            self.mark(model, self.owners(sender, instance.pk), using)
+        else:
+            self.mark(model, pk_set, using)
+
+    def handle_save(self, sender, instance, using, **kwargs):
+        self.mark(sender, [instance.pk], using)
+
+    def handle_delete(self, sender, instance, using, **kwargs):
+        self.mark(sender, [instance.pk], using, deleted=True)
+
+    def handle_related(self, sender, instance, using, **kwargs):
+        """
+        Objects related to a saved or deleted object, whose name may be part
+        of their documents.
+
+        On deletion the links are still there but are removed in the same
+        transaction, so they are looked up before.
+        """
+        for through, (model, related) in self.relations.items():
+            if related.related_model is sender:
+                self.mark(model, self.owners(through, instance.pk), using)
+
+    def owners(self, through, pk):
+        """
+        Primary keys of the indexed objects linked to `pk` by `through`.
+        """
+        model, related = self.relations[through]
+        return list(
+            through.objects.filter(**{related.m2m_reverse_name(): pk}).values_list(
+                related.m2m_column_name(), flat=True
+            )
+        )
+
+    def mark(self, model, pks, using, deleted=False):
+        """
+        Reindex objects, or remove `deleted` ones from the index, when the
+        current transaction commits, together with the others marked in it.
+        Outside of a transaction this happens right away.
+        """
+        if not pks:
+            return
+        connection = connections[using]
+        pending = getattr(self.local, using, None)
+        # A batch is registered until it is run or its transaction is rolled
+        # back, see `django.db.transaction.on_commit()`.
+        if pending is None or not any(
+            entry[1] is pending for entry in connection.run_on_commit
+        ):
+            pending = Pending()
+            setattr(self.local, using, pending)
+            pending.add(model, pks, deleted)
+            transaction.on_commit(pending, using=using)
+        else:
+            pending.add(model, pks, deleted)
+
+
+class Pending:
+    """
+    Primary keys of updated and deleted objects by model, written to the
+    search index when called.
+    """
+
+    def __init__(self):
+        self.updated = dict()
+        self.deleted = dict()
+
+    def add(self, model, pks, deleted=False):
+        # The last change of an object wins.
+        if deleted:
+            self.deleted.setdefault(model, set()).update(pks)
+            self.updated.get(model, set()).difference_update(pks)
+        else:
+            self.updated.setdefault(model, set()).update(pks)
+            self.deleted.get(model, set()).difference_update(pks)
+
+    def __call__(self):
+        if settings.LZK_SEARCH_QUEUE:
+            try:
+                django_rq.get_queue(settings.LZK_SEARCH_QUEUE).enqueue(
+                    reindex, labelled(self.updated), labelled(self.deleted)
+                )
+                return
+            except Exception:
+                logger.exception("Search index update could not be queued")
+        update_index(self.updated, self.deleted)
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Search backend keeping the documents as `tsvector` columns of the indexed
+    models, searched with PostgreSQL full text search.
+
+    The document text is rendered by the search index as usual and turned
+    into a vector by the database, once per text search configuration in the
+    `CONFIGS` option (German and English by default). The `name` of an object
+    is weighted higher than the rest of its document. Objects not part of the
+    index have no vector.
+
+    Queries use the syntax of `websearch_to_tsquery()`, e.g. `"exact phrase"`,
+    `-excluded` and `or`, which matches what `AutoQuery` produces.
+    """
+
+    RESERVED_WORDS = ()
+    RESERVED_CHARACTERS = ()
+    # Documents may be written by several processes at once.
+    concurrent_writes = True
+
+    def __init__(self, connection_alias, **connection_options):
+        super().__init__(connection_alias, **connection_options)
+        self.configs = connection_options.get("CONFIGS", ("german", "english"))
+        self.column = connection_options.get("COLUMN", "search")
+        self.using = connection_options.get("DATABASE", DEFAULT_DB_ALIAS)
+
+    def vector(self, value, weight):
+        return " || ".join(
+            f"setweight(to_tsvector('{config}', {value}), '{weight}')"
+            for config in self.configs
+        )
+
+    def update(self, index, iterable, commit=True):
+        model = index.get_model()
+        field = index.get_content_field()
+        pks, names, texts = [], [], []
+        for obj in iterable:
+            pks.append(obj.pk)
+            names.append(getattr(obj, "name", ""))
+            texts.append(index.full_prepare(obj)[field])
+        if not pks:
+            return
+        connection = connections[self.using]
+        qn = connection.ops.quote_name
+        pk = model._meta.pk
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(model._meta.db_table)} AS t "
+                f"SET {qn(self.column)} = "
+                f"{self.vector('d.name', 'A')} || {self.vector('d.text', 'B')} "
+                f"FROM unnest(%s::{pk.rel_db_type(connection)}[], %s::text[], "
+                f"%s::text[]) AS d (pk, name, text) "
+                f"WHERE t.{qn(pk.column)} = d.pk",
+                [pks, names, texts],
+            )
+
+    def remove(self, obj_or_string, commit=True):
+        app_label, model_name, pk = get_identifier(obj_or_string).split(".", 2)
+        model = apps.get_model(app_label, model_name)
+        model._base_manager.using(self.using).filter(pk=pk).update(
+            **{self.column: None}
+        )
+
+    def clear(self, models=None, commit=True):
+        for model in models or self.indexed_models():
+            model._base_manager.using(self.using).exclude(
+                **{f"{self.column}__isnull": True}
+            ).update(**{self.column: None})
+
+    def indexed_models(self):
+        return (
+            haystack_connections[self.connection_alias]
+            .get_unified_index()
+            .get_indexed_models()
+        )
+
+    @log_query
+    def search(
+        self,
+        query_string,
+        start_offset=0,
+        end_offset=None,
+        models=None,
+        result_class=None,
+        **kwargs,
+    ):
+        if not query_string:
+            return {"results": [], "hits": 0}
+        models = [m for m in self.indexed_models() if not models or m in models]
+        if not models:
+            return {"results": [], "hits": 0}
+        connection = connections[self.using]
+        qn = connection.ops.quote_name
+        column = qn(self.column)
+        if query_string == "*":
+            match, rank = f"{column} IS NOT NULL", "0"
+        else:
+            match, rank = f"{column} @@ q.query", f"ts_rank_cd({column}, q.query)"
+        selects = []
+        params = []
+        for model in models:
+            selects.append(
+                f"SELECT %s AS model, {qn(model._meta.pk.column)}::text AS pk, "
+                f"{rank} AS score FROM {qn(model._meta.db_table)}, q WHERE {match}"
+            )
+            params.append(model._meta.label_lower)
+        union = " UNION ALL ".join(selects)
+        query = " || ".join(
+            "websearch_to_tsquery(%s::regconfig, %s)" for config in self.configs
+        )
+        params = [
+            value for config in self.configs for value in (config, query_string)
+        ] + params
+        limit = None if end_offset is None else end_offset - start_offset
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH q AS (SELECT {query} AS query) "
+                f"SELECT model, pk, score, COUNT(*) OVER () FROM ({union}) AS r "
+                f"ORDER BY score DESC, model, pk LIMIT %s OFFSET %s",
+                params + [limit, start_offset],
+            )
+            rows = cursor.fetchall()
+            if rows:
+                hits = rows[0][3]
+            elif start_offset:
+                # Past the last result, count them separately.
+                cursor.execute(
+                    f"WITH q AS (SELECT {query} AS query) "
+                    f"SELECT COUNT(*) FROM ({union}) AS r",
+                    params,
+                )
+                hits = cursor.fetchone()[0]
+            else:
+                hits = 0
+        result_class = result_class or SearchResult
+        results = []
+        for label, pk, score, count in rows:
+            app_label, model_name = label.split(".")
+            results.append(result_class(app_label, model_name, pk, score))
+        return {"results": results, "hits": hits}
+
+    def prep_value(self, db_field, value):
+        return value
+
+    def more_like_this(self, model_instance, *args, **kwargs):
+        return {"results": [], "hits": 0}
+
+
+class PostgresSearchQuery(SimpleSearchQuery):
+    def build_not_query(self, query_string):
+        return f"-{query_string}"
+
+
+class PostgresEngine(BaseEngine):
+    backend = PostgresSearchBackend
+    query = PostgresSearchQuery
@@ -0,0 +1,87 @@
+import logging
+
+from django.apps import apps
+from haystack import connection_router, connections
+from haystack.exceptions import NotHandled
+from haystack.utils import get_model_ct
+
+from .conf import settings
+from .utils import chunked
+
+logger = logging.getLogger(__name__)
+
+
+def update_index(updated, deleted, batch_size=None):
+    """
+    Update the search documents of the given primary keys, given as sets by
+    model, instead of rebuilding the whole index.
+
+    Updated objects no longer part of the index queryset (e.g. no longer
+    public) and deleted objects are removed from the index. Models without
+    a search index are ignored.
+
+    Returns the number of updated and removed documents by model label.
+    """
+    batch_size = batch_size or settings.LZK_SEARCH_BATCH_SIZE
+    counts = dict()
+    for using in connection_router.for_write():
+        backend = connections[using].get_backend()
+        unified = connections[using].get_unified_index()
+        for model in {*updated, *deleted}:
+            try:
+                index = unified.get_index(model)
+            except NotHandled:
+                continue
+            label = model._meta.label_lower
+            stats = counts.setdefault(label, {"updated": 0, "removed": 0})
+            removed = set(deleted.get(model, ()))
+            for batch in chunked(sorted(updated.get(model, ())), batch_size):
+                objects = list(index.index_queryset(using=using).filter(pk__in=batch))
+                if objects:
+                    backend.update(index, objects)
+                stats["updated"] += len(objects)
+                removed.update(set(batch) - {o.pk for o in objects})
+            for pk in removed:
+                backend.remove(f"{get_model_ct(model)}.{pk}")
+            stats["removed"] += len(removed)
+            logger.info(
+                f"Search index of {label}: {stats['updated']} updated, "
+                f"{stats['removed']} removed"
+            )
+    return counts
+
+
+def labelled(pks):
+    """
+    Primary keys by model label instead of model, e.g. to pass them to
+    `reindex()` in a job.
+    """
+    return {model._meta.label_lower: list(p) for model, p in pks.items() if p}
+
+
+def reindex(updated, deleted):
+    """
+    Job running `update_index()` for primary keys by model label.
+    """
+    return update_index(
+        {apps.get_model(label): set(p) for label, p in updated.items()},
+        {apps.get_model(label): set(p) for label, p in deleted.items()},
+    )
+
+
+def index_range(using, label, first, last):
+    """
+    Index the objects of a model with primary keys from `first` to `last`,
+    e.g. in a worker process of `rebuild_search_index`.
+
+    Returns the model label and the number of indexed objects.
+    """
+    model = apps.get_model(label)
+    backend = connections[using].get_backend()
+    index = connections[using].get_unified_index().get_index(model)
+    objects = list(
+        index.index_queryset(using=using).filter(pk__gte=first, pk__lte=last)
+    )
+    if objects:
+        backend.update(index, objects)
+    return label, len(objects)
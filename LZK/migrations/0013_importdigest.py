@@ -0,0 +1,49 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:16
+
+import psqlextra.manager.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LZK", "0012_importjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportDigest",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=128)),
+                ("key", models.CharField(max_length=128)),
+                ("digest", models.CharField(max_length=32)),
+            ],
+            options={
+                "verbose_name": "Import digest",
+                "verbose_name_plural": "Import digests",
+            },
+            managers=[
+                ("objects", psqlextra.manager.manager.PostgresManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="importjob",
+            name="stats",
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddConstraint(
+            model_name="importdigest",
+            constraint=models.UniqueConstraint(
+                fields=("model", "key"), name="unique_model_key"
+            ),
+        ),
+    ]
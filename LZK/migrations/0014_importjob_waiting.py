@@ -0,0 +1,30 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LZK", "0013_importdigest"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="importjob",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("queued", "Queued"),
+                    ("waiting", "Waiting for another import"),
+                    ("running", "Running"),
+                    ("finished", "Finished"),
+                    ("failed", "Failed"),
+                    ("superseded", "Superseded by a newer import"),
+                ],
+                default="queued",
+                max_length=32,
+                verbose_name="Status",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LZK", "0014_importjob_waiting"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importjob",
+            name="checkpoint",
+            field=models.JSONField(default=dict),
+        ),
+    ]
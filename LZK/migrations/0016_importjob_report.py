@@ -0,0 +1,18 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LZK", "0015_importjob_checkpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importjob",
+            name="report",
+            field=models.JSONField(default=list),
+        ),
+    ]
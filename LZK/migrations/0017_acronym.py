@@ -0,0 +1,50 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:51
+
+import django_extensions.db.fields
+import psqlextra.manager.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LZK", "0016_importjob_report"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Acronym",
+            fields=[
+                (
+                    "created",
+                    django_extensions.db.fields.CreationDateTimeField(
+                        auto_now_add=True, verbose_name="created"
+                    ),
+                ),
+                (
+                    "modified",
+                    django_extensions.db.fields.ModificationDateTimeField(
+                        auto_now=True, verbose_name="modified"
+                    ),
+                ),
+                (
+                    "id",
+                    models.CharField(
+                        max_length=128,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="Acronym",
+                    ),
+                ),
+                ("name", models.CharField(max_length=512, verbose_name="Name")),
+            ],
+            options={
+                "verbose_name": "Acronym",
+                "verbose_name_plural": "Acronyms",
+                "ordering": ("id",),
+            },
+            managers=[
+                ("objects", psqlextra.manager.manager.PostgresManager()),
+            ],
+        ),
+    ]
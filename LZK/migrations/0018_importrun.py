@@ -0,0 +1,83 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LZK", "0017_acronym"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "digest",
+                    models.CharField(blank=True, max_length=32, verbose_name="Digest"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Running"),
+                            ("finished", "Finished"),
+                            ("failed", "Failed"),
+                        ],
+                        default="running",
+                        max_length=32,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "started",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Started"),
+                ),
+                ("finished", models.DateTimeField(null=True, verbose_name="Finished")),
+                ("timings", models.JSONField(default=dict)),
+                ("stats", models.JSONField(default=dict)),
+                (
+                    "peak_memory",
+                    models.PositiveBigIntegerField(
+                        null=True, verbose_name="Peak memory"
+                    ),
+                ),
+                (
+                    "job",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="runs",
+                        to="LZK.importjob",
+                        verbose_name="Import job",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="User",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Import run",
+                "verbose_name_plural": "Import runs",
+                "ordering": ("-started",),
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:56
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LZK", "0018_importrun"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ability",
+            name="search",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="activity",
+            name="search",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="skill",
+            name="search",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="symptom",
+            name="search",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ability",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search"], name="ability_search"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="activity",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search"], name="activity_search"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="skill",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search"], name="skill_search"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="symptom",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search"], name="symptom_search"
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.12 on 2026-10-18 14:08
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LZK", "0019_search"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="ability",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="ability_name", opclasses=("gin_trgm_ops",)
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="skill",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="skill_name", opclasses=("gin_trgm_ops",)
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="symptom",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="symptom_name", opclasses=("gin_trgm_ops",)
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.12 on 2026-10-18 14:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LZK", "0020_trigram"),
+    ]
+
+    # `icontains` compares UPPER(name); Django 3.2 cannot declare such
+    # expression indexes in Meta.indexes, so they are created with SQL.
+    operations = [
+        migrations.RemoveIndex(
+            model_name="ability",
+            name="ability_name",
+        ),
+        migrations.RemoveIndex(
+            model_name="skill",
+            name="skill_name",
+        ),
+        migrations.RemoveIndex(
+            model_name="symptom",
+            name="symptom_name",
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX "ability_name_upper" ON "LZK_ability" '
+            'USING gin ((UPPER("name")) gin_trgm_ops)',
+            'DROP INDEX "ability_name_upper"',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX "skill_name_upper" ON "LZK_skill" '
+            'USING gin ((UPPER("name")) gin_trgm_ops)',
+            'DROP INDEX "skill_name_upper"',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX "symptom_name_upper" ON "LZK_symptom" '
+            'USING gin ((UPPER("name")) gin_trgm_ops)',
+            'DROP INDEX "symptom_name_upper"',
+        ),
+    ]
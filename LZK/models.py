@@ -6,7 +6,9 @@ import mimeparse
 from django.contrib.auth.models import AbstractUser
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
@@ -16,6 +18,7 @@ from markupfield.fields import MarkupField
 from ordered_model.models import OrderedModel
 from psqlextra.manager import PostgresManager
 
+from . import acronyms
 from .conf import settings
 from .utils import Uuid4Upload
 from .validators import FileValidator
@@ -174,6 +177,7 @@ class Ability(TimeStampedModel):
     rolemodel = models.ForeignKey(
         "RoleModel", blank=True, null=True, on_delete=models.SET_NULL
     )
+    search = SearchVectorField(null=True, editable=False)
 
     objects = PostgresManager()
 
@@ -181,6 +185,7 @@ class Ability(TimeStampedModel):
         verbose_name = _("Ability")
         verbose_name_plural = _("Abilities")
         ordering = ("name",)
+        indexes = (GinIndex(fields=("search",), name="ability_search"),)
 
     def get_absolute_url(self):
         return reverse("ability-detail", kwargs={"pk": self.pk})
@@ -193,6 +198,7 @@ class Symptom(TimeStampedModel):
     name = models.CharField(max_length=512, verbose_name=_("Symptom"))
     subjects = models.ManyToManyField("Subject")
     public = models.BooleanField(default=False)
+    search = SearchVectorField(null=True, editable=False)
 
     objects = PostgresManager()
 
@@ -200,6 +206,7 @@ class Symptom(TimeStampedModel):
         verbose_name = _("Symptom")
         verbose_name_plural = _("Symptoms")
         ordering = ("name",)
+        indexes = (GinIndex(fields=("search",), name="symptom_search"),)
 
     def get_absolute_url(self):
         return reverse("symptom-detail", kwargs={"pk": self.pk})
@@ -225,6 +232,7 @@ class CompetenceLevel(OrderedModel):
 class Activity(models.Model):
     name = models.CharField(max_length=512, verbose_name=_("Name"))
     competence_level = models.ForeignKey("CompetenceLevel", on_delete=models.CASCADE)
+    search = SearchVectorField(null=True, editable=False)
 
     objects = PostgresManager()
 
@@ -232,6 +240,7 @@ class Activity(models.Model):
         verbose_name = _("Activity")
         verbose_name_plural = _("Activities")
         ordering = ("name",)
+        indexes = (GinIndex(fields=("search",), name="activity_search"),)
         constraints = (models.UniqueConstraint(fields=("name",), name="unique_name"),)
 
     def get_absolute_url(self):
@@ -247,6 +256,7 @@ class Skill(models.Model):
     clinical_traineeship_checklist = models.BooleanField(
         default=False, verbose_name=_("Clinical traineeship checklist")
     )
+    search = SearchVectorField(null=True, editable=False)
 
     objects = PostgresManager()
 
@@ -254,6 +264,7 @@ class Skill(models.Model):
         verbose_name = _("Skill")
         verbose_name_plural = _("Skills")
         ordering = ("name",)
+        indexes = (GinIndex(fields=("search",), name="skill_search"),)
 
     def get_absolute_url(self):
         return reverse("skill-detail", kwargs={"pk": self.pk})
@@ -438,3 +449,168 @@ class RoleModel(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class Acronym(TimeStampedModel):
+    id = models.CharField(max_length=128, primary_key=True, verbose_name=_("Acronym"))
+    name = models.CharField(max_length=512, verbose_name=_("Name"))
+
+    objects = PostgresManager()
+
+    class Meta:
+        verbose_name = _("Acronym")
+        verbose_name_plural = _("Acronyms")
+        ordering = ("id",)
+
+    def __str__(self):
+        return f"{self.name} ({self.id})"
+
+    @staticmethod
+    @receiver(models.signals.post_save, sender="LZK.Acronym")
+    @receiver(models.signals.post_delete, sender="LZK.Acronym")
+    def invalidate(sender, **kwargs):
+        transaction.on_commit(acronyms.invalidate)
+
+
+class ImportJob(TimeStampedModel):
+    QUEUED = "queued"
+    WAITING = "waiting"
+    RUNNING = "running"
+    FINISHED = "finished"
+    FAILED = "failed"
+    SUPERSEDED = "superseded"
+    STATUS_CHOICES = (
+        (QUEUED, _("Queued")),
+        (WAITING, _("Waiting for another import")),
+        (RUNNING, _("Running")),
+        (FINISHED, _("Finished")),
+        (FAILED, _("Failed")),
+        (SUPERSEDED, _("Superseded by a newer import")),
+    )
+    ACTIVE = (QUEUED, WAITING, RUNNING)
+
+    user = models.ForeignKey(
+        "User", verbose_name=_("User"), on_delete=models.SET_NULL, null=True
+    )
+    file = models.FileField(upload_to=Uuid4Upload, verbose_name=_("File"))
+    status = models.CharField(
+        max_length=32, choices=STATUS_CHOICES, default=QUEUED, verbose_name=_("Status")
+    )
+    phase = models.CharField(max_length=32, blank=True, verbose_name=_("Phase"))
+    progress = models.JSONField(default=dict)
+    stats = models.JSONField(default=dict)
+    checkpoint = models.JSONField(default=dict)
+    report = models.JSONField(default=list)
+    error = models.TextField(default="", blank=True)
+
+    class Meta:
+        verbose_name = _("Import job")
+        verbose_name_plural = _("Import jobs")
+        ordering = ("-created",)
+
+    def get_absolute_url(self):
+        return reverse("private:import-detail", kwargs={"pk": self.pk})
+
+    def resumable(self):
+        """
+        Failed imports can be resumed unless a newer one finished since.
+
+        Invalid workbooks, which have a `report`, would fail again.
+        """
+        return (
+            self.status == self.FAILED
+            and not self.report
+            and not ImportJob.objects.filter(
+                status=self.FINISHED, created__gt=self.created
+            ).exists()
+        )
+
+    def ahead(self):
+        """
+        Number of active imports submitted before this one.
+        """
+        return ImportJob.objects.filter(
+            status__in=self.ACTIVE, created__lt=self.created
+        ).count()
+
+    def __str__(self):
+        return f"{self.file.name} ({self.get_status_display()})"
+
+
+class ImportRun(models.Model):
+    RUNNING = "running"
+    FINISHED = "finished"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (RUNNING, _("Running")),
+        (FINISHED, _("Finished")),
+        (FAILED, _("Failed")),
+    )
+
+    job = models.ForeignKey(
+        "ImportJob",
+        verbose_name=_("Import job"),
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="runs",
+    )
+    user = models.ForeignKey(
+        "User", verbose_name=_("User"), on_delete=models.SET_NULL, null=True
+    )
+    digest = models.CharField(max_length=32, blank=True, verbose_name=_("Digest"))
+    status = models.CharField(
+        max_length=32, choices=STATUS_CHOICES, default=RUNNING, verbose_name=_("Status")
+    )
+    started = models.DateTimeField(auto_now_add=True, verbose_name=_("Started"))
+    finished = models.DateTimeField(null=True, verbose_name=_("Finished"))
+    timings = models.JSONField(default=dict)
+    stats = models.JSONField(default=dict)
+    peak_memory = models.PositiveBigIntegerField(
+        null=True, verbose_name=_("Peak memory")
+    )
+
+    class Meta:
+        verbose_name = _("Import run")
+        verbose_name_plural = _("Import runs")
+        ordering = ("-started",)
+
+    def duration(self):
+        if self.finished:
+            return self.finished - self.started
+
+    def rows(self):
+        """
+        Rows read in all completed phases.
+        """
+        return sum(t["rows"] for t in self.timings.values())
+
+    def totals(self):
+        """
+        Inserted, changed, unchanged and deleted rows of all models.
+        """
+        totals = {"inserted": 0, "changed": 0, "unchanged": 0, "deleted": 0}
+        for counts in self.stats.values():
+            for key in totals:
+                totals[key] += counts.get(key, 0)
+        return totals
+
+    def __str__(self):
+        return f"{self.started} ({self.get_status_display()})"
+
+
+class ImportDigest(models.Model):
+    model = models.CharField(max_length=128)
+    key = models.CharField(max_length=128)
+    digest = models.CharField(max_length=32)
+
+    objects = PostgresManager()
+
+    class Meta:
+        verbose_name = _("Import digest")
+        verbose_name_plural = _("Import digests")
+        constraints = (
+            models.UniqueConstraint(fields=("model", "key"), name="unique_model_key"),
+        )
+
+    def __str__(self):
+        return f"{self.model}: {self.key}"
@@ -2,7 +2,7 @@ from django.apps import AppConfig
 from django.core.checks import Tags, register
 from django.utils.translation import gettext_lazy as _
 
-from .checks import check_email_from
+from .checks import check_email_from, check_import_queue
 
 
 class LZKPrivateConfig(AppConfig):
@@ -12,3 +12,4 @@ class LZKPrivateConfig(AppConfig):
     def ready(self):
         super().ready()
         register(Tags.admin)(check_email_from)
+        register()(check_import_queue)
@@ -11,3 +11,15 @@ def check_email_from(app_configs, **kwargs):
             obj=settings,
             id=f"{__package__}.E001",
         )
+
+
+def check_import_queue(app_configs, **kwargs):
+    if settings.LZK_IMPORT_QUEUE not in getattr(settings, "RQ_QUEUES", {}):
+        yield Error(
+            f"Queue {settings.LZK_IMPORT_QUEUE} is not configured in RQ_QUEUES",
+            hint="Make sure to define the queue named in settings.LZK_IMPORT_QUEUE "
+            "in settings.RQ_QUEUES.",
+            obj=settings,
+            id=f"{__package__}.E002",
+        )
+
@@ -8,6 +8,13 @@ class LZKPrivateAppConf(AppConf):
     IMPORT_SHEET_UFIDS = "ufid_IMS_Gesamtliste 2019"
     IMPORT_VALUE_TRUE = "ja"
     IMPORT_VALUE_FALSE = "nein"
+    IMPORT_CHUNK_SIZE = 1000
+    IMPORT_LOADER = "LZK.private.loaders.CopyLoader"
+    IMPORT_PARALLEL = False
+    IMPORT_QUEUE = "default"
+    IMPORT_TIMEOUT = 3600
+    IMPORT_LOCK = 0x4C5A4B
+    IMPORT_MAX_DELETED = 0.1
     EMAIL_FROM = None
     FERNET_KEY = b""
 
@@ -0,0 +1,36 @@
+import logging
+from contextlib import contextmanager
+
+from django.utils import timezone
+
+from .. import models
+from .importer import peak_memory
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def record(importer, **kwargs):
+    """
+    Record a run of `importer` as `ImportRun`, created with `kwargs`.
+
+    The run is stored outside of the transactions of the import, so failed
+    runs are recorded as well. Phases completed by an earlier run which is
+    resumed keep their timings.
+    """
+    run = models.ImportRun.objects.create(**kwargs)
+    try:
+        yield run
+    except BaseException:
+        run.status = models.ImportRun.FAILED
+        raise
+    else:
+        run.status = models.ImportRun.FINISHED
+    finally:
+        run.finished = timezone.now()
+        run.digest = getattr(importer, "digest", "")
+        run.timings = getattr(importer, "timings", {})
+        run.stats = getattr(importer, "stats", {})
+        run.peak_memory = peak_memory()
+        run.save()
+        logger.info(f"Import run {run.pk} took {run.duration()}")
@@ -0,0 +1,770 @@
+import hashlib
+import json
+import logging
+import resource
+import time
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+from openpyxl.utils import get_column_letter
+from psqlextra.query import ConflictAction
+
+from .. import acronyms, models
+from ..utils import chunked
+from .conf import settings
+from .loaders import CopyLoader, LinkReconciler, upsert_ordered
+
+logger = logging.getLogger(__name__)
+
+
+def split(value, separator=","):
+    """
+    Split a comma separated cell into stripped, non-empty values.
+    """
+    if not value:
+        return []
+    return [v for v in map(str.strip, str(value).split(separator)) if v]
+
+
+def digest(*values):
+    """
+    Stable content hash of JSON serializable values.
+    """
+    return hashlib.blake2b(
+        json.dumps(values, sort_keys=True, default=str).encode("utf-8"),
+        digest_size=16,
+    ).hexdigest()
+
+
+def parse_ufids(value):
+    """
+    Parse the UFID cell, which is either a single number, a float if Excel
+    decided to interpret "1.2" as such or a comma separated list.
+    """
+    if isinstance(value, int):
+        return [value]
+    if isinstance(value, float):
+        return [int(u) for u in split(value, ".")]
+    return [int(u) for u in split(value)]
+
+
+def peak_memory():
+    """
+    Peak resident memory of the process in bytes.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class CellError(ValueError):
+    """
+    Invalid value in the cell `column` (zero based) of the current row.
+    """
+
+    def __init__(self, column, message):
+        super().__init__(message)
+        self.column = column
+
+
+class InvalidWorkbook(ValidationError):
+    """
+    Raised at the end of a phase which found invalid cells, `report` lists
+    them by sheet, row and column.
+    """
+
+    def __init__(self, report, count):
+        super().__init__(
+            _("The workbook contains %(count)d invalid cells."),
+            code="invalid",
+            params={"count": count},
+        )
+        self.report = report
+
+
+def text(row, column):
+    """
+    Stripped text of a required cell.
+    """
+    value = row[column]
+    if value is None or not str(value).strip():
+        raise CellError(column, _("A value is required."))
+    return str(value).strip()
+
+
+def integer(row, column, required=True):
+    """
+    Whole number in a cell, `None` for an empty optional one.
+    """
+    value = row[column]
+    if value is None or value == "":
+        if required:
+            raise CellError(column, _("A value is required."))
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    try:
+        if isinstance(value, bool):
+            raise ValueError(value)
+        return int(str(value).strip())
+    except ValueError:
+        raise CellError(column, _("Not a whole number.")) from None
+
+
+def flag(value, true):
+    """
+    Whether a yes/no cell says yes.
+    """
+    return value is not None and str(value).strip().lower() == true
+
+
+def assign_slugs(model, rows, name="slug"):
+    """
+    Set the `AutoSlugField` called `name` on rows given as field dicts, as
+    `save()` would, but with a single query for the existing slugs.
+
+    Rows already stored with a slug keep it, new slugs are made unique
+    against the stored ones and those of the other rows.
+    """
+    field = model._meta.get_field(name)
+    existing = dict(model.objects.exclude(**{name: ""}).values_list("pk", name))
+    taken = set(existing.values())
+    populate_from = field._populate_from
+    if not isinstance(populate_from, (list, tuple)):
+        populate_from = (populate_from,)
+    # Used by `slug_generator()` to shorten slugs, set in `create_slug()`.
+    field.slug_len = field.max_length
+    for row in rows:
+        if row["pk"] in existing:
+            row[name] = existing[row["pk"]]
+            continue
+        slug = field.separator.join(
+            field.slugify_func(str(row[f]), field.slugify_function)
+            for f in populate_from
+        )
+        if field.slug_len:
+            slug = slug[: field.slug_len]
+        slug = field._slug_strip(slug)
+        if not field.allow_duplicates:
+            slug = next(s for s in field.slug_generator(slug, 2) if s not in taken)
+        taken.add(slug)
+        row[name] = slug
+
+
+class Importer:
+    """
+    Import the catalog from a workbook, see `sources.Workbook`.
+
+    The import is split into phases which are run in order. Each phase is
+    reported to the optional `progress` callable as `(phase, done, total)`.
+
+    Rows are streamed from the workbook, normalised and written to the
+    database in chunks of `chunk_size` rows, so memory usage does not grow
+    with the size of the workbook. Only the small lookup tables (subjects,
+    levels, systems, ...) are kept in memory for the whole import.
+
+    The acronyms sheet is stored in `Acronym`, so the names of acronyms can be
+    resolved outside of the import, see `LZK.acronyms`.
+
+    A content digest of every imported row (including its links) is kept in
+    `ImportDigest`. Rows whose digest did not change since the last import
+    are not written again, rows that disappeared from the workbook are
+    unpublished or deleted, see `delete_missing()`. An identical workbook is
+    skipped altogether unless `force` is set. `run()` returns the number of inserted, changed, unchanged and
+    deleted rows per model, the wall time, rows read and peak memory after
+    each phase are kept in `timings`.
+
+    The sheets read are announced to the source with `prefetch()` before the
+    first one is read, so sources like `sources.ParallelWorkbook` can parse
+    them concurrently. The database writes always happen here, in order.
+
+    The many-to-many tables are reconciled with all links in the workbook at
+    the end of the objectives phase, so links removed from the workbook are
+    removed from the database as well.
+
+    The primary keys of written and deleted rows are kept by model in
+    `updated` and `deleted`, see `LZK.indexing.update_index()`. Objects linked to
+    a renamed subject or level count as updated.
+
+    Invalid cells are collected in `report` while the rows are parsed. Once
+    a phase found one, it stops writing but keeps parsing, and raises
+    `InvalidWorkbook` at its end, which rolls the phase back. At most
+    `MAX_ERRORS` cells are listed.
+
+    Each phase is a checkpoint: `checkpoint` is called with the serializable
+    `state()` at the end of every phase, inside its transaction. An import
+    which failed later can be resumed by passing the last state as `resume`,
+    completed phases are then skipped.
+    """
+
+    WORKBOOK = "workbook"
+
+    MAX_ERRORS = 1000
+
+    PHASES = (
+        ("acronyms", _("Acronyms")),
+        ("ufids", _("UFIDs")),
+        ("objectives", _("Objectives")),
+    )
+
+    LOOKUPS = (
+        models.Subject,
+        models.Level,
+        models.System,
+        models.StudyField,
+        models.RoleModel,
+        models.CompetenceLevel,
+    )
+
+    FIELDS = {
+        models.Ability: (
+            "id",
+            "name",
+            "depth",
+            "subject_related",
+            "public",
+            "rolemodel_id",
+            "study_field_id",
+        ),
+        models.Skill: ("id", "name", "clinical_traineeship_checklist", "activity_id"),
+        models.Symptom: ("id", "name", "public"),
+    }
+
+    LINKS = {
+        models.Ability.subjects.through: ["ability_id", "subject_id"],
+        models.Ability.levels.through: ["ability_id", "level_id"],
+        models.Ability.systems.through: ["ability_id", "system_id"],
+        models.Ability.ufids.through: ["ability_id", "ufid_id"],
+        models.Symptom.subjects.through: ["symptom_id", "subject_id"],
+    }
+
+    def __init__(
+        self,
+        source,
+        progress=None,
+        chunk_size=None,
+        loader=None,
+        force=False,
+        checkpoint=None,
+        resume=None,
+    ):
+        self.source = source
+        self.force = force
+        self.progress = progress or (lambda phase, done, total: None)
+        self.checkpoint = checkpoint or (lambda state: None)
+        self.resume = resume
+        self.chunk_size = chunk_size or settings.LZK_IMPORT_CHUNK_SIZE
+        self.loader = loader or import_string(settings.LZK_IMPORT_LOADER)()
+        self.links = LinkReconciler()
+
+    def run(self):
+        self.stats = dict()
+        self.timings = dict()
+        self.seen = dict()
+        self.updated = dict()
+        self.deleted = dict()
+        self.renamed = dict()
+        self.acronyms = None
+        self.report = []
+        self.errors = 0
+        if self.resume:
+            self.restore(self.resume)
+        self.digest = self.source.digest
+        if (
+            not self.force
+            and models.ImportDigest.objects.filter(
+                model=self.WORKBOOK, digest=self.digest
+            ).exists()
+        ):
+            logger.info(f"Workbook {self.digest} was already imported")
+            return self.stats
+        sheets = self.sheets()
+        # Sheets of phases completed before resuming are not read again.
+        self.source.prefetch(
+            {
+                sheet: sheets[sheet]
+                for phase, sheet in self.phase_sheets().items()
+                if phase not in self.timings
+            }
+        )
+        self.source.validate(list(sheets))
+        for phase, label in self.PHASES:
+            if phase in self.timings:
+                logger.info(f"Import phase already completed: {phase}")
+                continue
+            self.run_phase(phase)
+        models.ImportDigest.objects.on_conflict(
+            ["model", "key"], ConflictAction.UPDATE
+        ).insert(model=self.WORKBOOK, key="", digest=self.digest)
+        return self.stats
+
+    def run_phase(self, phase):
+        """
+        Run a phase in its own transaction and record its timing.
+        """
+        logger.info(f"Import phase: {phase}")
+        start = time.perf_counter()
+        with transaction.atomic():
+            rows = getattr(self, f"import_{phase}")()
+            if self.errors:
+                raise InvalidWorkbook(self.report, self.errors)
+            self.timings[phase] = {
+                "seconds": time.perf_counter() - start,
+                "rows": rows,
+                "memory": peak_memory(),
+            }
+            self.checkpoint(self.state())
+
+    def state(self):
+        """
+        Results of the completed phases, as far as later phases and callers
+        need them, see `restore()`.
+        """
+        return {
+            "stats": self.stats,
+            "timings": self.timings,
+            "updated": {m._meta.label_lower: list(p) for m, p in self.updated.items()},
+            "deleted": {m._meta.label_lower: list(p) for m, p in self.deleted.items()},
+        }
+
+    def restore(self, state):
+        self.stats = state["stats"]
+        self.timings = state["timings"]
+        self.updated = {apps.get_model(k): set(v) for k, v in state["updated"].items()}
+        self.deleted = {apps.get_model(k): set(v) for k, v in state["deleted"].items()}
+
+    def sheets(self):
+        """
+        Sheets read by the import as `(min_row, max_col)` by sheet name.
+        """
+        return {
+            settings.LZK_IMPORT_SHEET_ACRONYMS: (1, 2),
+            settings.LZK_IMPORT_SHEET_UFIDS: (2, 4),
+            settings.LZK_IMPORT_SHEET_OBJECTIVES: (2, 19),
+        }
+
+    def phase_sheets(self):
+        """
+        Sheet read by each phase.
+        """
+        return {
+            "acronyms": settings.LZK_IMPORT_SHEET_ACRONYMS,
+            "ufids": settings.LZK_IMPORT_SHEET_UFIDS,
+            "objectives": settings.LZK_IMPORT_SHEET_OBJECTIVES,
+        }
+
+    def rows(self, sheet):
+        min_row, max_col = self.sheets()[sheet]
+        return self.source.rows(sheet, min_row=min_row, max_col=max_col)
+
+    def numbered(self, sheet):
+        """
+        Rows of a sheet with their row numbers.
+        """
+        return enumerate(self.rows(sheet), start=self.sheets()[sheet][0])
+
+    def invalid(self, sheet, number, row, error):
+        """
+        Add an invalid cell to the report.
+        """
+        self.errors += 1
+        if len(self.report) >= self.MAX_ERRORS:
+            return
+        value = row[error.column] if error.column < len(row) else None
+        self.report.append(
+            {
+                "sheet": sheet,
+                "row": number,
+                "column": get_column_letter(error.column + 1),
+                "value": None if value is None else str(value),
+                "message": str(error),
+            }
+        )
+
+    def counts(self, label):
+        return self.stats.setdefault(
+            label, {"inserted": 0, "changed": 0, "unchanged": 0, "deleted": 0}
+        )
+
+    def changes(self, model, digests):
+        """
+        Compare the digests of a chunk of rows, given as a mapping of primary
+        key to digest, with those of the last import.
+
+        Returns the primary keys of inserted and changed rows and stores their
+        new digests.
+        """
+        label = model._meta.label_lower
+        stats = self.counts(label)
+        keys = {str(k): k for k in digests}
+        self.seen.setdefault(label, set()).update(keys)
+        existing = dict(
+            models.ImportDigest.objects.filter(model=label, key__in=keys).values_list(
+                "key", "digest"
+            )
+        )
+        inserted = [k for s, k in keys.items() if s not in existing]
+        changed = [
+            k for s, k in keys.items() if s in existing and existing[s] != digests[k]
+        ]
+        stats["inserted"] += len(inserted)
+        stats["changed"] += len(changed)
+        stats["unchanged"] += len(keys) - len(inserted) - len(changed)
+        self.updated.setdefault(model, set()).update(inserted + changed)
+        if inserted or changed:
+            models.ImportDigest.objects.on_conflict(
+                ["model", "key"], ConflictAction.UPDATE
+            ).bulk_insert(
+                [
+                    {"model": label, "key": str(k), "digest": digests[k]}
+                    for k in inserted + changed
+                ]
+            )
+        return inserted, changed
+
+    def delete_missing(self, model):
+        """
+        Remove rows imported earlier which are no longer in the workbook.
+
+        Rows of models with a `public` flag are unpublished instead of
+        deleted, which would also delete the comments on them. Their digest
+        is dropped, so they are published again once they reappear. Other
+        rows are deleted, unless more than `LZK_IMPORT_MAX_DELETED` of them
+        would be, which hints at a truncated workbook and requires `force`.
+        """
+        label = model._meta.label_lower
+        seen = self.seen.get(label, set())
+        keys = models.ImportDigest.objects.filter(model=label).values_list(
+            "key", flat=True
+        )
+        stale = [k for k in keys.iterator() if k not in seen]
+        if not stale:
+            return
+        unpublish = any(f.name == "public" for f in model._meta.fields)
+        if (
+            not unpublish
+            and not self.force
+            and len(stale) > settings.LZK_IMPORT_MAX_DELETED * keys.count()
+        ):
+            raise ValidationError(
+                _(
+                    "The import would delete %(count)d of %(total)d rows of "
+                    "%(model)s, force it to proceed."
+                ),
+                code="deleted",
+                params={
+                    "count": len(stale),
+                    "total": keys.count(),
+                    "model": model._meta.verbose_name_plural,
+                },
+            )
+        for chunk in chunked(stale, self.chunk_size):
+            pks = [model._meta.pk.to_python(k) for k in chunk]
+            if unpublish:
+                model.objects.filter(pk__in=pks).update(public=False)
+                self.updated.setdefault(model, set()).update(pks)
+            else:
+                model.objects.filter(pk__in=pks).delete()
+                self.deleted.setdefault(model, set()).update(pks)
+            models.ImportDigest.objects.filter(model=label, key__in=chunk).delete()
+        self.counts(label)["deleted"] += len(stale)
+
+    def import_acronyms(self):
+        sheet = settings.LZK_IMPORT_SHEET_ACRONYMS
+        total = self.source.total(sheet, header=0)
+        self.progress("acronyms", 0, total)
+        names = dict()
+        rows = 0
+        for number, row in self.numbered(sheet):
+            rows += 1
+            if not row[1] or not str(row[1]).strip():
+                continue
+            try:
+                names[str(row[1]).strip().upper()] = text(row, 0)
+            except CellError as e:
+                self.invalid(sheet, number, row, e)
+        self.progress("acronyms", rows, total)
+        if self.errors:
+            return rows
+        inserted, changed = self.changes(
+            models.Acronym, {k: digest(v) for k, v in names.items()}
+        )
+        for chunk in chunked(inserted + changed, self.chunk_size):
+            self.loader.upsert(
+                models.Acronym, ("id", "name"), [(k, names[k]) for k in chunk]
+            )
+        self.delete_missing(models.Acronym)
+        # The loader bypasses the signals of `Acronym`, which invalidate the
+        # cache.
+        transaction.on_commit(acronyms.invalidate)
+        self.acronyms = names
+        return rows
+
+    def import_ufids(self):
+        sheet = settings.LZK_IMPORT_SHEET_UFIDS
+        total = self.source.total(sheet)
+        done = 0
+        self.progress("ufids", done, total)
+        for chunk in chunked(self.parse_ufid_rows(sheet), self.chunk_size):
+            done += len(chunk)
+            self.progress("ufids", done, total)
+            if self.errors:
+                continue
+            names = dict(chunk)
+            inserted, changed = self.changes(
+                models.UFID, {k: digest(v) for k, v in names.items()}
+            )
+            self.loader.upsert(
+                models.UFID, ("id", "name"), [(k, names[k]) for k in inserted + changed]
+            )
+        if not self.errors:
+            self.delete_missing(models.UFID)
+        return done
+
+    def parse_ufid_rows(self, sheet):
+        for number, row in self.numbered(sheet):
+            try:
+                yield integer(row, 2), text(row, 3)
+            except CellError as e:
+                self.invalid(sheet, number, row, e)
+
+    def import_objectives(self):
+        sheet = settings.LZK_IMPORT_SHEET_OBJECTIVES
+        total = self.source.total(sheet)
+        self.lookups = {model: set() for model in self.LOOKUPS}
+        self.pending = {model: dict() for model in self.LOOKUPS}
+        self.activities = dict()
+        self.pending_activities = dict()
+        self.ufids = set(models.UFID.objects.values_list("pk", flat=True))
+        # Set by the acronyms phase unless it was completed before resuming,
+        # the cache is only invalidated once the import commits.
+        if self.acronyms is None:
+            self.acronyms = acronyms.names()
+        done = 0
+        self.progress("objectives", done, total)
+        for chunk in chunked(self.parse_objectives(sheet), self.chunk_size):
+            done += len(chunk)
+            self.progress("objectives", done, total)
+            if not self.errors:
+                self.write_objectives(chunk)
+        if self.errors:
+            return done
+        for through, (owner, target) in self.LINKS.items():
+            deleted, inserted = self.links.apply(through, owner)
+            counts = self.counts(through._meta.label_lower)
+            counts["deleted"] += deleted
+            counts["inserted"] += inserted
+        for through, (owner, target) in self.LINKS.items():
+            renamed = self.renamed.get(through._meta.get_field(target).related_model)
+            if renamed:
+                self.updated.setdefault(
+                    through._meta.get_field(owner).related_model, set()
+                ).update(
+                    through.objects.filter(**{f"{target}__in": renamed}).values_list(
+                        owner, flat=True
+                    )
+                )
+        for model in self.FIELDS:
+            self.delete_missing(model)
+        return done
+
+    def lookup(self, model, values):
+        """
+        Map acronyms to primary keys of a lookup table, remembering those not
+        yet written to the database.
+        """
+        keys = []
+        for value in values:
+            key = value.upper()
+            if key not in self.lookups[model]:
+                self.lookups[model].add(key)
+                self.pending[model][key] = {
+                    "pk": key,
+                    "name": self.acronyms.get(key, value),
+                }
+            keys.append(key)
+        return keys
+
+    def parse_objectives(self, sheet):
+        """
+        Classify and normalise the rows of the objectives sheet, reporting
+        invalid ones.
+
+        Yields one `(model, values, links)` tuple per row, where `values` are
+        ordered like `FIELDS[model]` and `links` is a tuple of
+        `(through, target)` pairs for the many-to-many relations.
+        """
+        for number, row in self.numbered(sheet):
+            try:
+                record = self.parse_objective(row)
+            except CellError as e:
+                self.invalid(sheet, number, row, e)
+                continue
+            if record:
+                yield record
+
+    def parse_objective(self, row):
+        true = settings.LZK_IMPORT_VALUE_TRUE.lower()
+        Ability = models.Ability
+        pk = integer(row, 0)
+        name = text(row, 1)
+        public = flag(row[15], true)
+        if flag(row[10], true):
+            through = models.Symptom.subjects.through
+            return (
+                models.Symptom,
+                (pk, name, public),
+                tuple((through, s) for s in self.lookup(models.Subject, split(row[7]))),
+            )
+        if row[11]:
+            if not (row[3] and row[6]):
+                return None
+            (cl,) = self.lookup(models.CompetenceLevel, [text(row, 3)])
+            activity = text(row, 6)
+            if activity not in self.activities:
+                self.activities[activity] = None
+                self.pending_activities[activity] = cl
+            return models.Skill, (pk, name, flag(row[12], true), activity), ()
+        # Abilities without a study field are not imported.
+        if not row[18]:
+            return None
+        try:
+            ufids = parse_ufids(row[17])
+        except ValueError:
+            raise CellError(17, _("Not a list of UFIDs.")) from None
+        unknown = [u for u in ufids if u not in self.ufids]
+        if unknown:
+            raise CellError(
+                17,
+                _("Unknown UFIDs: %(ufids)s") % {"ufids": ", ".join(map(str, unknown))},
+            )
+        depth = integer(row, 2, required=False)
+        (sf,) = self.lookup(models.StudyField, [text(row, 18)])
+        # A single role model, commas in the cell are part of its acronym.
+        rm = self.lookup(models.RoleModel, [text(row, 14)]) if row[14] else []
+        return (
+            Ability,
+            (
+                pk,
+                name,
+                depth,
+                flag(row[9], true),
+                public,
+                rm[0] if rm else None,
+                sf,
+            ),
+            (
+                *(
+                    (Ability.levels.through, l)
+                    for l in self.lookup(models.Level, split(row[3]))
+                ),
+                *(
+                    (Ability.subjects.through, s)
+                    for s in self.lookup(models.Subject, split(row[7]))
+                ),
+                *(
+                    (Ability.systems.through, s)
+                    for s in self.lookup(models.System, split(row[13]))
+                ),
+                *((Ability.ufids.through, u) for u in ufids),
+            ),
+        )
+
+    def write_lookups(self):
+        """
+        Write lookup table entries and activities first seen in the current
+        chunk, unless they are already stored unchanged.
+        """
+        for model, pending in self.pending.items():
+            if not pending:
+                continue
+            # Subjects written by earlier imports may lack a slug.
+            slugged = ["slug"] if model is models.Subject else []
+            for pk, name, *slug in model.objects.filter(pk__in=pending).values_list(
+                "pk", "name", *slugged
+            ):
+                if model is models.CompetenceLevel or (
+                    pending[pk]["name"] == name and all(slug)
+                ):
+                    del pending[pk]
+                elif pending[pk]["name"] != name:
+                    self.renamed.setdefault(model, set()).add(pk)
+            if not pending:
+                continue
+            if model is models.CompetenceLevel:
+                upsert_ordered(model, list(pending.values()))
+            elif slugged:
+                assign_slugs(model, list(pending.values()))
+                # Bypasses `pre_save()`, which would query for every slug.
+                CopyLoader().upsert(
+                    model,
+                    ("id", "name", "slug"),
+                    [(v["pk"], v["name"], v["slug"]) for v in pending.values()],
+                )
+            else:
+                model.objects.on_conflict(["pk"], ConflictAction.UPDATE).bulk_insert(
+                    list(pending.values())
+                )
+            pending.clear()
+        if self.pending_activities:
+            for activity in models.Activity.objects.filter(
+                name__in=self.pending_activities
+            ):
+                self.activities[activity.name] = activity.pk
+                if (
+                    activity.competence_level_id
+                    == self.pending_activities[activity.name]
+                ):
+                    del self.pending_activities[activity.name]
+        if self.pending_activities:
+            for activity in models.Activity.objects.on_conflict(
+                ["name"], ConflictAction.UPDATE
+            ).bulk_insert(
+                [
+                    {"name": k, "competence_level_id": v}
+                    for k, v in self.pending_activities.items()
+                ],
+                return_model=True,
+            ):
+                self.activities[activity.name] = activity.pk
+                self.updated.setdefault(models.Activity, set()).add(activity.pk)
+            self.pending_activities.clear()
+
+    def write_objectives(self, chunk):
+        self.write_lookups()
+        records = {model: dict() for model in self.FIELDS}
+        for model, values, links in chunk:
+            records[model][values[0]] = (values, links)
+        for model, data in records.items():
+            if not data:
+                continue
+            inserted, changed = self.changes(
+                model,
+                {
+                    pk: digest(
+                        values,
+                        sorted((t._meta.model_name, target) for t, target in links),
+                    )
+                    for pk, (values, links) in data.items()
+                },
+            )
+            rows = [data[pk][0] for pk in inserted + changed]
+            if model is models.Skill:
+                rows = [(*v[:-1], self.activities[v[-1]]) for v in rows]
+            self.loader.upsert(model, self.FIELDS[model], rows)
+            # All links are collected to find those removed from the workbook.
+            for through, (owner, *rest) in self.LINKS.items():
+                if through._meta.get_field(owner).related_model is not model:
+                    continue
+                self.links.collect(
+                    through,
+                    owner,
+                    list(data),
+                    [
+                        (pk, target)
+                        for pk, (values, links) in data.items()
+                        for t, target in links
+                        if t is through
+                    ],
+                )
@@ -0,0 +1,133 @@
+import logging
+
+import django_rq
+from django.core.exceptions import ValidationError
+from rq import get_current_job
+
+from .. import models
+from ..indexing import update_index
+from . import history
+from .conf import settings
+from .importer import Importer
+from .locks import import_lock
+from .sources import ParallelWorkbook, Workbook
+
+logger = logging.getLogger(__name__)
+
+
+def job_id(job):
+    """
+    ID of the RQ job running an `ImportJob`.
+    """
+    return f"LZK-import-{job.pk}"
+
+
+def enqueue(job):
+    django_rq.get_queue(settings.LZK_IMPORT_QUEUE).enqueue(
+        run_import,
+        job.pk,
+        job_id=job_id(job),
+        job_timeout=settings.LZK_IMPORT_TIMEOUT,
+    )
+
+
+def live_progress(job):
+    """
+    Current phase and progress of an `ImportJob`.
+
+    While the import runs, progress is kept in the meta data of its RQ job,
+    as the import transaction hides it in the database until a phase ends.
+    """
+    if job.status != models.ImportJob.RUNNING:
+        return job.phase, job.progress
+    rq_job = django_rq.get_queue(settings.LZK_IMPORT_QUEUE).fetch_job(job_id(job))
+    if rq_job is None:
+        return job.phase, job.progress
+    return (
+        rq_job.meta.get("phase", job.phase),
+        {**job.progress, **rq_job.meta.get("progress", {})},
+    )
+
+
+def run_import(pk):
+    """
+    Run the import for an `ImportJob` inside an RQ worker.
+
+    Imports are serialized by `locks.import_lock()`, across all workers. A
+    job which gets the lock while a newer one is queued is superseded by it,
+    as each import replaces the whole catalog.
+
+    Progress is stored in the meta data of the RQ job after each step so the
+    import page can poll it while the worker is busy, see `live_progress()`. The
+    state after each completed phase is stored as `checkpoint`, from which a
+    failed job continues when it is run again.
+    """
+    job = models.ImportJob.objects.get(pk=pk)
+
+    def waiting():
+        job.status = models.ImportJob.WAITING
+        job.save(update_fields=["status", "modified"])
+
+    with import_lock(on_wait=waiting):
+        if models.ImportJob.objects.filter(
+            status__in=(models.ImportJob.QUEUED, models.ImportJob.WAITING),
+            created__gt=job.created,
+        ).exists():
+            logger.info(f"Import superseded by a newer one: {job}")
+            job.status = models.ImportJob.SUPERSEDED
+            job.save(update_fields=["status", "modified"])
+            return
+        execute(job)
+
+
+def execute(job):
+    job.status = models.ImportJob.RUNNING
+    job.save(update_fields=["status", "modified"])
+
+    rq_job = get_current_job()
+
+    def progress(phase, done, total):
+        job.phase = phase
+        job.progress[phase] = {"done": done, "total": total}
+        if rq_job is not None:
+            rq_job.meta.update(phase=job.phase, progress=job.progress)
+            rq_job.save_meta()
+
+    def checkpoint(state):
+        job.checkpoint = state
+        job.save(update_fields=["checkpoint", "phase", "progress", "modified"])
+
+    try:
+        with job.file.open("rb") as f:
+            if settings.LZK_IMPORT_PARALLEL:
+                workbook = ParallelWorkbook(f, path=job.file.path)
+            else:
+                workbook = Workbook(f)
+            with workbook:
+                importer = Importer(
+                    workbook,
+                    progress=progress,
+                    checkpoint=checkpoint,
+                    resume=job.checkpoint,
+                )
+                with history.record(importer, job=job, user=job.user):
+                    job.stats = importer.run()
+        # The changes are committed, so the index can be updated.
+        update_index(importer.updated, importer.deleted)
+    except ValidationError as e:
+        logger.info(f"Import of invalid workbook: {job}")
+        job.status = models.ImportJob.FAILED
+        job.error = " ".join(e.messages)
+        job.report = getattr(e, "report", [])
+        job.save(
+            update_fields=["status", "error", "report", "phase", "progress", "modified"]
+        )
+        return
+    except Exception as e:
+        logger.exception(f"Import failed: {job}")
+        job.status = models.ImportJob.FAILED
+        job.error = str(e)
+        job.save(update_fields=["status", "error", "phase", "progress", "modified"])
+        raise
+    job.status = models.ImportJob.FINISHED
+    job.save(update_fields=["status", "stats", "phase", "progress", "modified"])
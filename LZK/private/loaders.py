@@ -0,0 +1,355 @@
+import io
+import logging
+
+from django.db import connection
+from django.utils import timezone
+from psqlextra.query import ConflictAction
+from psqlextra.util import postgres_manager
+
+logger = logging.getLogger(__name__)
+
+
+def columns(model, fields):
+    """
+    Map field names to column names, resolving `pk`.
+    """
+    opts = model._meta
+    return [opts.pk.column if f == "pk" else opts.get_field(f).column for f in fields]
+
+
+def link_columns(through, owner):
+    """
+    Columns of a many-to-many table, starting with the one of `owner`.
+    """
+    cols = [through._meta.get_field(owner).column]
+    cols.extend(
+        f.column
+        for f in through._meta.concrete_fields
+        if f.is_relation and f.column not in cols
+    )
+    return cols
+
+
+def upsert_ordered(model, rows, conflict_target=("pk",)):
+    """
+    Insert or update rows of an `OrderedModel` subclass, given as a list of
+    field dicts, with a single statement.
+
+    New rows are appended in the given order, after the last row with the
+    same `order_with_respect_to` values. Existing rows keep their position.
+    Fields missing from the rows get their default on insert. Without a
+    `conflict_target` all rows are inserted.
+    """
+    if not rows:
+        return
+    opts = model._meta
+    quote = connection.ops.quote_name
+    table = quote(opts.db_table)
+    order = opts.get_field(model.order_field_name).column
+    now = timezone.now()
+    fields = [opts.pk if k == "pk" else opts.get_field(k) for k in rows[0]]
+    given = list(fields)
+    defaults = [
+        f
+        for f in opts.concrete_fields
+        if f not in fields and f.column != order and not f.auto_created
+    ]
+    values = []
+    for row in rows:
+        values.extend(row.values())
+        values.extend(
+            now
+            if getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False)
+            else f.get_default()
+            for f in defaults
+        )
+    fields.extend(defaults)
+    cols = [f.column for f in fields]
+    wrt = model.order_with_respect_to or ()
+    if isinstance(wrt, str):
+        wrt = (wrt,)
+    wrt = [opts.get_field(name).column for name in wrt]
+    keys = [opts.pk.column if k == "pk" else k for k in conflict_target or ()]
+    placeholder = "(" + ", ".join(f"%s::{f.db_type(connection)}" for f in fields)
+    source = (
+        "(VALUES "
+        + ", ".join(f"{placeholder}, {i})" for i in range(len(rows)))
+        + f") AS v ({', '.join(map(quote, cols))}, seq)"
+    )
+    last = (
+        f"(SELECT COALESCE(MAX(m.{quote(order)}), -1) FROM {table} m"
+        + "".join(
+            f" {'WHERE' if i == 0 else 'AND'} m.{quote(c)} = v.{quote(c)}"
+            for i, c in enumerate(wrt)
+        )
+        + ")"
+    )
+    partition = ", ".join(f"v.{quote(c)}" for c in wrt)
+    if keys:
+        source += f" LEFT JOIN {table} t ON " + " AND ".join(
+            f"t.{quote(c)} = v.{quote(c)}" for c in keys
+        )
+        position = (
+            f"COALESCE(t.{quote(order)}, {last} + ROW_NUMBER() OVER ("
+            f"PARTITION BY {partition + ', ' if wrt else ''}t.{quote(keys[0])} IS NULL "
+            f"ORDER BY v.seq))"
+        )
+    else:
+        position = (
+            f"{last} + ROW_NUMBER() OVER ("
+            f"{'PARTITION BY ' + partition + ' ' if wrt else ''}ORDER BY v.seq)"
+        )
+    sql = (
+        f"INSERT INTO {table} ({', '.join(map(quote, cols))}, {quote(order)}) "
+        f"SELECT {', '.join(f'v.{quote(c)}' for c in cols)}, {position} "
+        f"FROM {source}"
+    )
+    if keys:
+        # Defaults, creation timestamps and positions are kept when updating.
+        update = [
+            f.column
+            for f in fields
+            if f.column not in keys and (f in given or getattr(f, "auto_now", False))
+        ]
+        sql += f" ON CONFLICT ({', '.join(map(quote, keys))}) DO " + (
+            "UPDATE SET "
+            + ", ".join(f"{quote(c)} = EXCLUDED.{quote(c)}" for c in update)
+            if update
+            else "NOTHING"
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, values)
+
+
+class InsertLoader:
+    """
+    Write rows using multi-row `INSERT ... ON CONFLICT` statements built by
+    django-postgres-extra.
+
+    Rows are tuples of values, which are turned into the field dicts
+    django-postgres-extra expects one chunk at a time.
+    """
+
+    def upsert(self, model, fields, rows, conflict_target=("pk",)):
+        """
+        Insert or update rows, given as tuples ordered like `fields`.
+        """
+        if not rows:
+            return
+        model.objects.on_conflict(
+            list(conflict_target), ConflictAction.UPDATE
+        ).bulk_insert([dict(zip(fields, row)) for row in rows])
+
+    def replace(self, through, owner, owners, rows):
+        """
+        Make the links of `owners` in a many-to-many table exactly `rows`,
+        given as tuples ordered like `link_columns()`.
+        """
+        if owners:
+            through.objects.filter(**{f"{owner}__in": owners}).delete()
+        if not rows:
+            return
+        cols = link_columns(through, owner)
+        with postgres_manager(through) as manager:
+            manager.get_queryset().on_conflict(cols, ConflictAction.UPDATE).bulk_insert(
+                [dict(zip(cols, row)) for row in rows]
+            )
+
+
+class CopyLoader:
+    """
+    Write rows by `COPY`ing them into a temporary staging table and merging
+    that into the real table with set based statements.
+
+    Must be used inside a transaction, the staging tables are dropped on
+    commit at the latest.
+    """
+
+    def quote(self, name):
+        return connection.ops.quote_name(name)
+
+    def encode(self, value):
+        """
+        Encode a value for the text format of `COPY`.
+        """
+        if value is None:
+            return "\\N"
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        return (
+            str(value)
+            .replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+
+    def create(self, cursor, table, cols, prefix="staging"):
+        """
+        Create an empty staging table shaped like `cols` of `table`.
+        """
+        staging = self.quote(f"{prefix}_{table}")
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS "
+            f"SELECT {', '.join(map(self.quote, cols))} "
+            f"FROM {self.quote(table)} WITH NO DATA"
+        )
+        return staging
+
+    def copy(self, cursor, staging, cols, rows):
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(map(self.encode, row)))
+            buffer.write("\n")
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {staging} ({', '.join(map(self.quote, cols))}) FROM STDIN",
+            buffer,
+        )
+
+    def stage(self, cursor, table, cols, rows):
+        """
+        Create a staging table shaped like `cols` of `table` and fill it.
+        """
+        staging = self.create(cursor, table, cols)
+        self.copy(cursor, staging, cols, rows)
+        # Temporary tables are not analyzed automatically.
+        cursor.execute(f"ANALYZE {staging}")
+        return staging
+
+    def upsert(self, model, fields, rows, conflict_target=("pk",)):
+        """
+        Insert or update rows, given as tuples ordered like `fields`.
+        """
+        if not rows:
+            return
+        opts = model._meta
+        cols = columns(model, fields)
+        now = timezone.now()
+        auto = [
+            f
+            for f in opts.concrete_fields
+            if (getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False))
+            and f.column not in cols
+        ]
+        cols.extend(f.column for f in auto)
+        stamps = (now,) * len(auto)
+        values = ((*row, *stamps) for row in rows)
+        keys = [opts.pk.column if k == "pk" else k for k in conflict_target]
+        # Creation timestamps are kept when updating existing rows.
+        created = [f.column for f in auto if not getattr(f, "auto_now", False)]
+        update = [c for c in cols if c not in keys and c not in created]
+        with connection.cursor() as cursor:
+            staging = self.stage(cursor, opts.db_table, cols, values)
+            cursor.execute(
+                f"INSERT INTO {self.quote(opts.db_table)} "
+                f"({', '.join(map(self.quote, cols))}) "
+                f"SELECT DISTINCT ON ({', '.join(map(self.quote, keys))}) "
+                f"{', '.join(map(self.quote, cols))} FROM {staging} "
+                f"ON CONFLICT ({', '.join(map(self.quote, keys))}) DO "
+                + (
+                    "UPDATE SET "
+                    + ", ".join(
+                        f"{self.quote(c)} = EXCLUDED.{self.quote(c)}" for c in update
+                    )
+                    if update
+                    else "NOTHING"
+                )
+            )
+            cursor.execute(f"DROP TABLE {staging}")
+
+    def replace(self, through, owner, owners, rows):
+        """
+        Make the links of `owners` in a many-to-many table exactly `rows`,
+        given as tuples ordered like `link_columns()`.
+        """
+        if not owners and not rows:
+            return
+        table = through._meta.db_table
+        cols = link_columns(through, owner)
+        with connection.cursor() as cursor:
+            staging = self.stage(cursor, table, cols, rows)
+            match = " AND ".join(
+                f"{staging}.{self.quote(c)} = {self.quote(table)}.{self.quote(c)}"
+                for c in cols
+            )
+            if owners:
+                cursor.execute(
+                    f"DELETE FROM {self.quote(table)} "
+                    f"WHERE {self.quote(cols[0])} = ANY(%s) "
+                    f"AND NOT EXISTS (SELECT 1 FROM {staging} WHERE {match})",
+                    [list(owners)],
+                )
+            cursor.execute(
+                f"INSERT INTO {self.quote(table)} "
+                f"({', '.join(map(self.quote, cols))}) "
+                f"SELECT DISTINCT {', '.join(map(self.quote, cols))} FROM {staging} "
+                f"ON CONFLICT DO NOTHING"
+            )
+            cursor.execute(f"DROP TABLE {staging}")
+
+
+class LinkReconciler(CopyLoader):
+    """
+    Reconcile many-to-many tables with the links found in a workbook.
+
+    While the workbook is streamed, `collect()` copies the links and their owners
+    into staging tables which live until the end of the transaction. `apply()`
+    then computes the difference to the stored links and removes stale and
+    adds missing ones with one `DELETE` and one `INSERT` per table.
+    """
+
+    def __init__(self):
+        self.staged = dict()
+
+    def collect(self, through, owner, owners, rows):
+        """
+        Stage the links of `owners`, given as tuples ordered like
+        `link_columns()`.
+        """
+        table = through._meta.db_table
+        cols = link_columns(through, owner)
+        with connection.cursor() as cursor:
+            if table not in self.staged:
+                self.staged[table] = (
+                    self.create(cursor, table, cols[:1], prefix="owners"),
+                    self.create(cursor, table, cols, prefix="links"),
+                )
+            owners_staging, links_staging = self.staged[table]
+            self.copy(cursor, owners_staging, cols[:1], ([o] for o in owners))
+            self.copy(cursor, links_staging, cols, rows)
+
+    def apply(self, through, owner):
+        """
+        Apply the staged links, returning the number of deleted and inserted
+        links.
+        """
+        table = through._meta.db_table
+        if table not in self.staged:
+            return 0, 0
+        cols = link_columns(through, owner)
+        owners_staging, links_staging = self.staged.pop(table)
+        match = " AND ".join(
+            f"{links_staging}.{self.quote(c)} = {self.quote(table)}.{self.quote(c)}"
+            for c in cols
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {owners_staging}")
+            cursor.execute(f"ANALYZE {links_staging}")
+            cursor.execute(
+                f"DELETE FROM {self.quote(table)} "
+                f"WHERE {self.quote(cols[0])} IN "
+                f"(SELECT {self.quote(cols[0])} FROM {owners_staging}) "
+                f"AND NOT EXISTS (SELECT 1 FROM {links_staging} WHERE {match})"
+            )
+            deleted = cursor.rowcount
+            cursor.execute(
+                f"INSERT INTO {self.quote(table)} "
+                f"({', '.join(map(self.quote, cols))}) "
+                f"SELECT DISTINCT {', '.join(map(self.quote, cols))} "
+                f"FROM {links_staging} ON CONFLICT DO NOTHING"
+            )
+            inserted = cursor.rowcount
+            cursor.execute(f"DROP TABLE {owners_staging}, {links_staging}")
+        return deleted, inserted
@@ -0,0 +1,33 @@
+import logging
+from contextlib import contextmanager
+
+from django.db import connection
+
+from .conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def import_lock(on_wait=None):
+    """
+    Hold the PostgreSQL advisory lock `LZK_IMPORT_LOCK`, so only one import
+    runs at a time in the whole cluster.
+
+    The lock belongs to the database session and is not affected by
+    transactions. If another import holds it, `on_wait` is called before
+    waiting for it to be released.
+    """
+    key = settings.LZK_IMPORT_LOCK
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [key])
+        if not cursor.fetchone()[0]:
+            logger.info("Waiting for the import lock")
+            if on_wait:
+                on_wait()
+            cursor.execute("SELECT pg_advisory_lock(%s)", [key])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
@@ -0,0 +1,126 @@
+import json
+import platform
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from LZK import models
+
+from ...conf import settings
+from ...importer import Importer
+from ...locks import import_lock
+from ...sources import open_source
+
+
+class MeasuredImporter(Importer):
+    """
+    Importer recording the peak of traced memory and the number of queries
+    of each phase in `timings`.
+    """
+
+    def run_phase(self, phase):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        tracemalloc.reset_peak()
+        with connection.execute_wrapper(count):
+            super().run_phase(phase)
+        self.timings[phase].update(
+            peak=tracemalloc.get_traced_memory()[1], queries=queries
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Import workbooks and report time, peak memory and queries per phase. "
+        "Nothing is committed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "files", nargs="+", help="Paths to workbooks or directories of sheets."
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.LZK_IMPORT_CHUNK_SIZE
+        )
+        parser.add_argument("--loader", default=settings.LZK_IMPORT_LOADER)
+        parser.add_argument(
+            "--parallel",
+            action="store_true",
+            default=settings.LZK_IMPORT_PARALLEL,
+            help="Parse each sheet in a separate process, whose memory is not "
+            "traced.",
+        )
+        parser.add_argument(
+            "--warm",
+            action="store_true",
+            help="Keep the digests of earlier imports, so unchanged rows are "
+            "skipped.",
+        )
+        parser.add_argument("--repeat", type=int, default=1)
+        parser.add_argument(
+            "--output", help="Append the results as JSON lines to this file."
+        )
+
+    def handle(self, *args, **options):
+        tracemalloc.start()
+        try:
+            for path in options["files"]:
+                for _ in range(options["repeat"]):
+                    with open_source(path, options["parallel"]) as workbook:
+                        result = self.measure(path, workbook, options)
+                    self.report(result)
+                    if options["output"]:
+                        with open(options["output"], "a") as output:
+                            output.write(json.dumps(result) + "\n")
+        finally:
+            tracemalloc.stop()
+
+    def measure(self, path, workbook, options):
+        importer = MeasuredImporter(
+            workbook,
+            chunk_size=options["chunk_size"],
+            loader=import_string(options["loader"])(),
+            force=True,
+        )
+        # Foreign keys are deferred, rolling back skips checking them.
+        with import_lock(), transaction.atomic():
+            if not options["warm"]:
+                models.ImportDigest.objects.all().delete()
+            start = time.perf_counter()
+            importer.run()
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return {
+            "file": path,
+            "date": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "loader": options["loader"],
+            "chunk_size": options["chunk_size"],
+            "format": type(workbook).__name__,
+            "parallel": options["parallel"],
+            "warm": options["warm"],
+            "seconds": elapsed,
+            "phases": importer.timings,
+        }
+
+    def report(self, result):
+        self.stdout.write(f"{result['file']}:")
+        for phase, timing in result["phases"].items():
+            self.stdout.write(
+                f"  {phase:<12} {timing['rows']:>9} rows "
+                f"{timing['seconds']:>9.2f}s "
+                f"{timing['peak'] / 2**20:>9.1f} MiB "
+                f"{timing['queries']:>7} queries"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"  Import finished in {result['seconds']:.2f}s")
+        )
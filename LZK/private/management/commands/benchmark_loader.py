@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from LZK import models
+
+from ...loaders import CopyLoader, InsertLoader, LinkReconciler
+
+
+class Command(BaseCommand):
+    help = "Compare the import loaders on synthetic links. Nothing is committed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--abilities", type=int, default=20000, help="Number of abilities."
+        )
+        parser.add_argument(
+            "--fanout", type=int, default=5, help="Subjects linked to each ability."
+        )
+
+    def handle(self, *args, **options):
+        owners = list(range(1, options["abilities"] + 1))
+        rows = [(a, f"S{s}") for a in owners for s in range(options["fanout"])]
+        through = models.Ability.subjects.through
+        results = []
+        for loader in (InsertLoader(), CopyLoader()):
+            # Foreign keys are deferred, rolling back skips checking them.
+            with transaction.atomic():
+                start = time.perf_counter()
+                loader.replace(through, "ability_id", owners, rows)
+                elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+            results.append((loader.__class__.__name__, elapsed))
+            self.stdout.write(
+                f"{loader.__class__.__name__}: {len(rows)} links in {elapsed:.2f}s "
+                f"({len(rows) / elapsed:.0f} rows/s)"
+            )
+        (_, baseline), (_, copy) = results
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {baseline / copy:.1f}x"))
+        with transaction.atomic():
+            through.objects.bulk_create(
+                through(ability_id=a, subject_id=s) for a, s in rows[: len(rows) // 2]
+            )
+            start = time.perf_counter()
+            reconciler = LinkReconciler()
+            reconciler.collect(through, "ability_id", owners, rows[len(rows) // 4 :])
+            deleted, inserted = reconciler.apply(through, "ability_id")
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        self.stdout.write(
+            f"LinkReconciler: {deleted} deleted, {inserted} inserted "
+            f"of {len(rows)} links in {elapsed:.2f}s"
+        )
@@ -0,0 +1,90 @@
+import statistics
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from haystack import connections
+from haystack.query import SearchQuerySet
+
+from LZK import models
+from LZK.utils import chunked
+
+from ...conf import settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare search connections: time to index all documents and to run "
+        "queries like the search page does."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "queries",
+            nargs="*",
+            help="Queries to run, by default frequent and rare words of the "
+            "ability names.",
+        )
+        parser.add_argument(
+            "--using",
+            action="append",
+            help="Search connection, may be repeated. Defaults to all of them.",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.LZK_IMPORT_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--skip-index",
+            action="store_true",
+            help="Only run the queries against the existing index.",
+        )
+
+    def handle(self, *args, **options):
+        queries = options["queries"] or self.sample_queries()
+        for using in options["using"] or list(connections.connections_info):
+            self.stdout.write(f"{using}:")
+            if not options["skip_index"]:
+                self.index(using, options["batch_size"])
+            for query in queries:
+                timings = []
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    results = SearchQuerySet(using=using).auto_query(query)
+                    hits = results.count()
+                    [r.pk for r in results[:10]]
+                    timings.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f"  {query!r:<32} {hits:>7} hits "
+                    f"{statistics.median(timings) * 1000:>9.1f} ms median "
+                    f"{max(timings) * 1000:>9.1f} ms max"
+                )
+
+    def index(self, using, batch_size):
+        backend = connections[using].get_backend()
+        unified = connections[using].get_unified_index()
+        start = time.perf_counter()
+        backend.clear()
+        documents = 0
+        for index in unified.get_indexes().values():
+            queryset = index.index_queryset(using=using).order_by("pk")
+            pks = queryset.values_list("pk", flat=True).iterator()
+            for batch in chunked(pks, batch_size):
+                # Prefetched relations are ignored by iterator().
+                objects = list(queryset.filter(pk__in=batch))
+                backend.update(index, objects)
+                documents += len(objects)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"  Indexed {documents} documents in {elapsed:.2f}s "
+            f"({documents / elapsed:.0f} documents/s)"
+        )
+
+    def sample_queries(self):
+        names = models.Ability.objects.values_list("name", flat=True)[:1000]
+        words = Counter(
+            word.lower() for name in names for word in name.split() if len(word) > 3
+        ).most_common()
+        frequent = [word for word, count in words[:2]]
+        rare = [word for word, count in words[-2:]]
+        return frequent + rare + [" ".join(frequent), f'"{" ".join(frequent)}"']
@@ -0,0 +1,163 @@
+import csv
+import random
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from openpyxl import Workbook
+
+from ...conf import settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a synthetic catalog workbook with the sheet layout expected by "
+        "the import, for benchmarks. Other formats than xlsx are written to a "
+        "directory with one file per sheet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Path of the workbook to write.")
+        parser.add_argument(
+            "--format",
+            choices=("xlsx", "csv", "tsv", "parquet"),
+            default="xlsx",
+        )
+        parser.add_argument(
+            "--objectives",
+            type=int,
+            default=10000,
+            help="Number of rows in the objectives sheet.",
+        )
+        parser.add_argument("--subjects", type=int, default=40)
+        parser.add_argument("--levels", type=int, default=6)
+        parser.add_argument("--systems", type=int, default=15)
+        parser.add_argument("--ufids", type=int, default=2000)
+        parser.add_argument("--activities", type=int, default=300)
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the random generator."
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        true = settings.LZK_IMPORT_VALUE_TRUE
+        false = settings.LZK_IMPORT_VALUE_FALSE
+        subjects = [f"SUB{i}" for i in range(options["subjects"])]
+        levels = [f"L{i}" for i in range(options["levels"])]
+        systems = [f"SYS{i}" for i in range(options["systems"])]
+        study_fields = ["HM", "ZM"]
+        rolemodels = ["ME", "CO", "CM", "LE", "HA", "SC", "PR"]
+        competence_levels = ["CL1", "CL2", "CL3", "CL4"]
+        activities = [f"Activity {i}" for i in range(options["activities"])]
+        ufids = range(1, options["ufids"] + 1)
+
+        def pick(values, low, high):
+            return ", ".join(
+                rng.sample(values, min(rng.randint(low, high), len(values)))
+            )
+
+        def objectives():
+            for pk in range(1, options["objectives"] + 1):
+                yield objective(pk)
+
+        def objective(pk):
+            row = [None] * 19
+            row[0] = pk
+            row[1] = f"Objective {pk} " + " ".join(
+                rng.choice(["clinical", "basic", "diagnosis", "therapy", "anatomy"])
+                for _ in range(rng.randint(3, 12))
+            )
+            row[10] = false
+            row[15] = true if rng.random() < 0.8 else false
+            kind = rng.random()
+            if kind < 0.15:
+                row[10] = true
+                row[7] = pick(subjects, 1, 3)
+            elif kind < 0.4:
+                row[11] = "x"
+                row[3] = rng.choice(competence_levels)
+                row[6] = rng.choice(activities)
+                row[12] = rng.choice([true, false])
+            else:
+                row[2] = rng.randint(1, 3)
+                row[3] = pick(levels, 1, 3)
+                row[7] = pick(subjects, 1, 4)
+                row[9] = rng.choice([true, false])
+                row[13] = pick(systems, 0, 2)
+                row[14] = rng.choice(rolemodels)
+                row[17] = ", ".join(
+                    map(str, rng.sample(ufids, min(rng.randint(1, 3), len(ufids))))
+                )
+                row[18] = rng.choice(study_fields)
+            return row
+
+        # Headers by sheet, the acronyms sheet has none.
+        sheets = {
+            settings.LZK_IMPORT_SHEET_ACRONYMS: (
+                None,
+                (
+                    [f"Name of {acronym}", acronym]
+                    for acronym in (
+                        subjects
+                        + levels
+                        + systems
+                        + study_fields
+                        + rolemodels
+                        + competence_levels
+                    )
+                ),
+            ),
+            settings.LZK_IMPORT_SHEET_UFIDS: (
+                ["Ebene 1", "Ebene 2", "UFID", "Bezeichnung"],
+                ([None, None, u, f"UFID {u}"] for u in ufids),
+            ),
+            settings.LZK_IMPORT_SHEET_OBJECTIVES: (
+                [f"Spalte {i}" for i in range(1, 20)],
+                objectives(),
+            ),
+        }
+        getattr(self, f"write_{options['format']}")(options["file"], sheets)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {options['objectives']} objectives to {options['file']}"
+            )
+        )
+
+    def write_xlsx(self, path, sheets):
+        wb = Workbook(write_only=True)
+        for name, (header, rows) in sheets.items():
+            sheet = wb.create_sheet(name)
+            if header:
+                sheet.append(header)
+            for row in rows:
+                sheet.append(row)
+        wb.save(path)
+
+    def write_csv(self, path, sheets, delimiter=",", extension="csv"):
+        Path(path).mkdir(parents=True, exist_ok=True)
+        for name, (header, rows) in sheets.items():
+            with open(
+                Path(path) / f"{name}.{extension}", "w", newline="", encoding="utf-8"
+            ) as f:
+                writer = csv.writer(f, delimiter=delimiter)
+                if header:
+                    writer.writerow(header)
+                writer.writerows(rows)
+
+    def write_tsv(self, path, sheets):
+        self.write_csv(path, sheets, delimiter="\t", extension="tsv")
+
+    def write_parquet(self, path, sheets):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise CommandError("Writing Parquet files requires pyarrow.") from e
+        Path(path).mkdir(parents=True, exist_ok=True)
+        for name, (header, rows) in sheets.items():
+            columns = list(zip(*rows))
+            # Parquet files always have column names, they are not read.
+            header = header or [f"Spalte {i}" for i in range(1, len(columns) + 1)]
+            table = pyarrow.Table.from_pydict(
+                {column: list(values) for column, values in zip(header, columns)}
+            )
+            pyarrow.parquet.write_table(table, Path(path) / f"{name}.parquet")
@@ -0,0 +1,118 @@
+import json
+import time
+from contextlib import nullcontext
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from LZK.indexing import update_index
+
+from ... import history
+from ...conf import settings
+from ...importer import Importer, InvalidWorkbook
+from ...locks import import_lock
+from ...sources import open_source
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the catalog from an Excel workbook or a directory of CSV, TSV or "
+        "Parquet files, one per sheet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Path to the workbook or directory of sheets.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.LZK_IMPORT_CHUNK_SIZE,
+            help="Number of rows written per statement.",
+        )
+        parser.add_argument(
+            "--loader",
+            default=settings.LZK_IMPORT_LOADER,
+            help="Dotted path of the loader class.",
+        )
+        parser.add_argument(
+            "--parallel",
+            action="store_true",
+            default=settings.LZK_IMPORT_PARALLEL,
+            help="Parse each sheet in a separate process.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Import even if the workbook was already imported or would "
+            "delete many rows.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Roll back all changes at the end.",
+        )
+        parser.add_argument(
+            "--report",
+            help="Write the invalid cells found as JSON to this file.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with open_source(options["file"], options["parallel"]) as workbook:
+            importer = Importer(
+                workbook,
+                chunk_size=options["chunk_size"],
+                loader=import_string(options["loader"])(),
+                force=options["force"],
+            )
+            with import_lock(
+                on_wait=lambda: self.stdout.write("Waiting for a running import...")
+            ):
+                # Dry runs are rolled back and not recorded in the history.
+                if options["dry_run"]:
+                    record = nullcontext()
+                else:
+                    record = history.record(importer)
+                try:
+                    with record, transaction.atomic():
+                        stats = importer.run()
+                        transaction.set_rollback(options["dry_run"])
+                except InvalidWorkbook as e:
+                    for error in e.report:
+                        self.stderr.write(
+                            "{sheet}!{column}{row}: {message} ({value!r})".format(
+                                **error
+                            )
+                        )
+                    if options["report"]:
+                        with open(options["report"], "w") as output:
+                            json.dump(e.report, output, indent=2)
+                    raise CommandError(" ".join(e.messages)) from e
+                except ValidationError as e:
+                    raise CommandError(" ".join(e.messages)) from e
+                if not options["dry_run"]:
+                    for model, counts in update_index(
+                        importer.updated, importer.deleted
+                    ).items():
+                        self.stdout.write(
+                            f"Search index of {model}: {counts['updated']} "
+                            f"updated, {counts['removed']} removed"
+                        )
+        elapsed = time.perf_counter() - start
+        if not stats:
+            self.stdout.write("Workbook was already imported, nothing to do.")
+        for phase, timing in importer.timings.items():
+            rate = timing["rows"] / timing["seconds"] if timing["seconds"] else 0
+            self.stdout.write(
+                f"{phase:<12} {timing['rows']:>9} rows {timing['seconds']:>9.2f}s "
+                f"{rate:>10.0f} rows/s"
+            )
+        for model, counts in stats.items():
+            self.stdout.write(
+                f"{model:<24} " + " ".join(f"{k}={v}" for k, v in counts.items())
+            )
+        message = f"Import finished in {elapsed:.2f}s"
+        if options["dry_run"]:
+            message += " (dry run, rolled back)"
+        self.stdout.write(self.style.SUCCESS(message))
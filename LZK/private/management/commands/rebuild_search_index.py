@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import time
+from collections import Counter
+
+import django
+from django.core.management.base import BaseCommand
+from haystack import connections
+
+from LZK.indexing import index_range
+from LZK.utils import chunked
+
+from ...conf import settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the search index with a pool of worker processes, each "
+        "indexing ranges of primary keys."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--using",
+            action="append",
+            help="Search connection, may be repeated. Defaults to all of them.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of worker processes, defaults to the number of CPUs.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.LZK_IMPORT_CHUNK_SIZE,
+            help="Number of objects per range.",
+        )
+
+    def handle(self, *args, **options):
+        for using in options["using"] or list(connections.connections_info):
+            backend = connections[using].get_backend()
+            unified = connections[using].get_unified_index()
+            workers = options["workers"]
+            if workers > 1 and not getattr(backend, "concurrent_writes", False):
+                self.stderr.write(
+                    f"The backend of {using} does not support concurrent writes, "
+                    "using one worker."
+                )
+                workers = 1
+            start = time.perf_counter()
+            tasks = []
+            for model, index in unified.get_indexes().items():
+                pks = (
+                    index.index_queryset(using=using)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)
+                    .iterator()
+                )
+                for batch in chunked(pks, options["batch_size"]):
+                    tasks.append((using, model._meta.label_lower, batch[0], batch[-1]))
+            backend.clear()
+            counts = Counter()
+            if workers > 1:
+                context = multiprocessing.get_context("spawn")
+                with context.Pool(workers, initializer=django.setup) as pool:
+                    for label, count in pool.imap_unordered(
+                        self.run, tasks, chunksize=1
+                    ):
+                        counts[label] += count
+            else:
+                for label, count in map(self.run, tasks):
+                    counts[label] += count
+            elapsed = time.perf_counter() - start
+            for label, count in sorted(counts.items()):
+                self.stdout.write(f"{using}: {count} {label}")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Indexed {sum(counts.values())} documents in {elapsed:.2f}s "
+                    f"with {workers} workers"
+                )
+            )
+
+    @staticmethod
+    def run(task):
+        return index_range(*task)
@@ -0,0 +1,346 @@
+import csv
+import hashlib
+import logging
+import multiprocessing
+import queue
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from openpyxl import load_workbook
+
+from ..validators import XlsxFileValidator
+
+logger = logging.getLogger(__name__)
+
+
+def read_sheet(path, sheet, min_row, max_col, size, messages):
+    """
+    Worker process of `ParallelWorkbook`, sending the cell values of a sheet
+    to `messages` as lists of at most `size` row tuples.
+
+    The first message is the number of rows, or the reason why the sheet
+    can not be read, the last one marks the end of the sheet.
+    """
+    try:
+        book = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+        if sheet not in book.sheetnames:
+            messages.put(("missing", sheet))
+            return
+        ws = book[sheet]
+        messages.put(("total", max((ws.max_row or min_row - 1) - (min_row - 1), 0)))
+        rows = ws.iter_rows(min_row=min_row, max_col=max_col, values_only=True)
+        while True:
+            batch = list(islice(rows, size))
+            if not batch:
+                break
+            messages.put(("rows", batch))
+        book.close()
+        messages.put(("done", None))
+    except Exception as e:
+        messages.put(("error", f"{sheet}: {e!r}"))
+
+
+def missing(sheet):
+    return ValidationError(
+        _("Document does not contain a sheet named {s}.").format(s=sheet)
+    )
+
+
+class Source:
+    """
+    Base class of the sources the importer reads sheets from.
+
+    Sources provide a `digest` of their content, `validate()` the presence of
+    sheets, iterate over their `rows()` as tuples of cell values and report
+    the `total()` number of rows.
+    """
+
+    def prefetch(self, sheets):
+        """
+        Announce the sheets which are going to be read, as a mapping of sheet
+        name to `(min_row, max_col)`.
+        """
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Workbook(Source):
+    """
+    Handle to an Excel workbook which is decompressed and parsed at most once.
+    """
+
+    def __init__(self, file):
+        self.file = file
+
+    @cached_property
+    def book(self):
+        return load_workbook(
+            self.file, read_only=True, data_only=True, keep_links=False
+        )
+
+    @cached_property
+    def digest(self):
+        h = hashlib.blake2b(digest_size=16)
+        position = self.file.tell()
+        self.file.seek(0)
+        for block in iter(lambda: self.file.read(1 << 16), b""):
+            h.update(block)
+        self.file.seek(position)
+        return h.hexdigest()
+
+    def validate(self, sheets):
+        """
+        Check that all sheets are present, raising `ValidationError` if not.
+        """
+        XlsxFileValidator(sheets=sheets).check(self.book)
+
+    def rows(self, sheet, min_row=1, max_col=None):
+        """
+        Iterate over the cell values of a sheet.
+        """
+        return self.book[sheet].iter_rows(
+            min_row=min_row, max_col=max_col, values_only=True
+        )
+
+    def total(self, sheet, header=1):
+        """
+        Number of rows in a sheet without the header, if known.
+        """
+        return max((self.book[sheet].max_row or header) - header, 0)
+
+    def close(self):
+        if "book" in self.__dict__:
+            self.book.close()
+
+
+class ParallelWorkbook(Workbook):
+    """
+    Workbook whose sheets are each parsed in a process of their own.
+
+    `prefetch()` starts one process per sheet, which sends the cell values in
+    batches through a bounded queue. Decompressing and parsing the XML thus
+    runs concurrently for all sheets and overlaps with the database writes
+    of the importing process, while at most `buffer` batches per sheet are
+    held in memory. Sheets not prefetched are read in process.
+
+    The workers open the workbook themselves, so it has to be a file on
+    disk.
+    """
+
+    buffer = 8
+
+    def __init__(self, file, path=None, batch_size=1000):
+        super().__init__(file)
+        self.path = path or file.name
+        self.batch_size = batch_size
+        # Forking would share the database connection with the workers.
+        self.context = multiprocessing.get_context("spawn")
+        self.readers = dict()
+        self.totals = dict()
+
+    def prefetch(self, sheets):
+        for sheet, (min_row, max_col) in sheets.items():
+            messages = self.context.Queue(self.buffer)
+            process = self.context.Process(
+                target=read_sheet,
+                args=(self.path, sheet, min_row, max_col, self.batch_size, messages),
+                daemon=True,
+            )
+            process.start()
+            self.readers[sheet] = (process, messages)
+
+    def receive(self, sheet):
+        process, messages = self.readers[sheet]
+        while True:
+            try:
+                kind, value = messages.get(timeout=1)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    raise RuntimeError(
+                        f"Reading sheet {sheet} failed: "
+                        f"worker exited with {process.exitcode}"
+                    )
+        if kind == "missing":
+            raise missing(value)
+        if kind == "error":
+            raise RuntimeError(f"Reading sheet failed: {value}")
+        return kind, value
+
+    def validate(self, sheets):
+        for sheet in sheets:
+            if sheet not in self.readers:
+                super().validate([sheet])
+            elif sheet not in self.totals:
+                self.totals[sheet] = self.receive(sheet)[1]
+
+    def rows(self, sheet, min_row=1, max_col=None):
+        if sheet not in self.readers:
+            return super().rows(sheet, min_row=min_row, max_col=max_col)
+        return self.stream(sheet)
+
+    def stream(self, sheet):
+        self.validate([sheet])
+        while True:
+            kind, batch = self.receive(sheet)
+            if kind == "done":
+                return
+            yield from batch
+
+    def total(self, sheet, header=1):
+        if sheet not in self.readers:
+            return super().total(sheet, header=header)
+        self.validate([sheet])
+        return self.totals[sheet]
+
+    def close(self):
+        for process, messages in self.readers.values():
+            if process.is_alive():
+                process.terminate()
+            process.join()
+            messages.close()
+        self.readers.clear()
+        super().close()
+
+
+class Files(Source):
+    """
+    Sheets exported to one file per sheet in a directory, each named after
+    its sheet, e.g. `Lernziele gesamt_Datenbank.csv`.
+    """
+
+    extension = None
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def file(self, sheet):
+        return self.path / f"{sheet}.{self.extension}"
+
+    @cached_property
+    def digest(self):
+        h = hashlib.blake2b(digest_size=16)
+        for path in sorted(self.path.glob(f"*.{self.extension}")):
+            h.update(path.name.encode("utf-8"))
+            with path.open("rb") as f:
+                for block in iter(lambda: f.read(1 << 16), b""):
+                    h.update(block)
+        return h.hexdigest()
+
+    def validate(self, sheets):
+        for sheet in sheets:
+            if not self.file(sheet).is_file():
+                raise missing(sheet)
+
+
+class CsvFiles(Files):
+    """
+    Sheets exported as UTF-8 CSV files with a header row.
+
+    The files are read with the `csv` module, which is much faster than
+    parsing the XML of a workbook. All values are text, empty cells are
+    `None`.
+    """
+
+    extension = "csv"
+    delimiter = ","
+
+    def rows(self, sheet, min_row=1, max_col=None):
+        with self.file(sheet).open(newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f, delimiter=self.delimiter)
+            padding = (None,) * (max_col or 0)
+            for row in islice(reader, min_row - 1, None):
+                values = tuple(v or None for v in row[:max_col])
+                yield values + padding[len(values) :]
+
+    def total(self, sheet, header=1):
+        """
+        Number of lines in the file without the header, which is not exact
+        if cells contain line breaks.
+        """
+        with self.file(sheet).open("rb") as f:
+            lines = sum(
+                block.count(b"\n") for block in iter(lambda: f.read(1 << 16), b"")
+            )
+        return max(lines - header, 0)
+
+
+class TsvFiles(CsvFiles):
+    """
+    Sheets exported as UTF-8 files with tab separated values.
+    """
+
+    extension = "tsv"
+    delimiter = "\t"
+
+
+class ParquetFiles(Files):
+    """
+    Sheets exported as Parquet files, read in column batches with pyarrow.
+
+    The column names of the files take the place of the header row of a
+    sheet, so `min_row=2` is the first row of a file.
+    """
+
+    extension = "parquet"
+    batch_size = 1000
+
+    def open(self, sheet):
+        try:
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImproperlyConfigured("Reading Parquet files requires pyarrow.") from e
+        return pyarrow.parquet.ParquetFile(self.file(sheet))
+
+    def rows(self, sheet, min_row=1, max_col=None):
+        parquet = self.open(sheet)
+        names = parquet.schema_arrow.names[:max_col]
+        padding = (None,) * ((max_col or 0) - len(names))
+        skip = max(min_row - 2, 0)
+        for batch in parquet.iter_batches(batch_size=self.batch_size, columns=names):
+            rows = zip(*(column.to_pylist() for column in batch.columns))
+            if skip:
+                rows = islice(rows, skip, None)
+                skip = max(skip - batch.num_rows, 0)
+            for row in rows:
+                yield row + padding
+
+    def total(self, sheet, header=1):
+        return self.open(sheet).metadata.num_rows
+
+
+@contextmanager
+def open_source(path, parallel=False):
+    """
+    Open the source at `path`, which is either a workbook or a directory of
+    CSV, TSV or Parquet files.
+    """
+    path = Path(path)
+    if path.is_dir():
+        # Without any matching files the sheets are reported as missing.
+        cls = next(
+            (
+                cls
+                for cls in (TsvFiles, ParquetFiles)
+                if any(path.glob(f"*.{cls.extension}"))
+            ),
+            CsvFiles,
+        )
+        with cls(path) as source:
+            yield source
+        return
+    with path.open("rb") as f, (ParallelWorkbook if parallel else Workbook)(
+        f
+    ) as source:
+        yield source
@@ -6,6 +6,18 @@ app_name = "private"
 urlpatterns = [
     path("", views.IndexView.as_view(), name="index"),
     path("import/", views.ImportView.as_view(), name="import"),
+    path("import/history/", views.ImportHistoryView.as_view(), name="import-history"),
+    path("import/<int:pk>/", views.ImportDetailView.as_view(), name="import-detail"),
+    path(
+        "import/<int:pk>/resume/",
+        views.ImportResumeView.as_view(),
+        name="import-resume",
+    ),
+    path(
+        "import/<int:pk>/status/",
+        views.ImportStatusView.as_view(),
+        name="import-status",
+    ),
     path("ability/filter/", views.AbilityFilterView.as_view(), name="ability-filter"),
     path("feedback/", views.ListFeedbackView.as_view(), name="feedback-list"),
     path(
@@ -1,6 +1,5 @@
 import json
 import logging
-from itertools import islice
 
 from braces.views import SuperuserRequiredMixin
 from crispy_forms.bootstrap import FormActions, StrictButton
@@ -9,8 +8,9 @@ from crispy_forms.layout import ButtonHolder, Fieldset, Layout, Submit
 from cryptography.fernet import Fernet
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
 from django.db.models import Model
-from django.http import HttpResponseNotAllowed, HttpResponseRedirect
+from django.http import HttpResponseNotAllowed, HttpResponseRedirect, JsonResponse
 from django.template import Context
 from django.template.loader import get_template
 from django.urls import reverse_lazy as reverse
@@ -26,15 +26,12 @@ from django.views.generic import (
 from django.views.generic.detail import SingleObjectMixin
 from django_filters.views import FilterView
 from django_tables2.views import SingleTableMixin
-from openpyxl import load_workbook
-from psqlextra.query import ConflictAction
-from psqlextra.util import postgres_manager
 
 from .. import models
 from ..filters import AbilityExtendedFilter
 from ..mixins import FilterFormHelperMixin
 from ..utils import ModelJSONEncoder
-from . import filters, forms, tables
+from . import filters, forms, importer, jobs, tables
 from .conf import settings
 
 logger = logging.getLogger(__name__)
@@ -56,278 +53,88 @@ class ImportView(LoginRequiredMixin, SuperuserRequiredMixin, FormView):
     }
     success_url = reverse("private:index")
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["jobs"] = models.ImportJob.objects.all()[:10]
+        context["queue"] = models.ImportJob.objects.filter(
+            status__in=models.ImportJob.ACTIVE
+        ).order_by("created")
+        return context
+
     def form_valid(self, form):
-        wb = load_workbook(
-            form.cleaned_data.get("file"),
-            read_only=True,
-            data_only=True,
-            keep_links=False,
-        )
-        acronyms = {
-            k.value.upper(): v.value
-            for v, k, *_ in wb.get_sheet_by_name(settings.LZK_IMPORT_SHEET_ACRONYMS)
-        }
-        ufid_sheet = wb.get_sheet_by_name(settings.LZK_IMPORT_SHEET_UFIDS)
-        ufid_data = (
-            {"id": x[2].value, "name": x[3].value}
-            for x in islice(ufid_sheet.iter_rows(), 1, None)
-        )
-        models.UFID.objects.on_conflict(["id"], ConflictAction.UPDATE).bulk_insert(
-            ufid_data
+        job = models.ImportJob.objects.create(
+            user=self.request.user, file=form.cleaned_data.get("file")
         )
+        transaction.on_commit(lambda: jobs.enqueue(job))
+        return HttpResponseRedirect(job.get_absolute_url())
 
-        objective_sheet = wb.get_sheet_by_name(settings.LZK_IMPORT_SHEET_OBJECTIVES)
-        ability_data = list()
-        role_model_data = dict()
-        level_data = dict()
-        activity_data = dict()
-        cl_data = dict()
-        skill_data = list()
-        skill_activity_map = dict()
-        subject_data = dict()
-        system_data = dict()
-        study_field_data = dict()
-        ability_level_data = list()
-        ability_subject_data = list()
-        ability_system_data = list()
-        ability_ufid_data = list()
-        ability_study_field_data = dict()
-        symptom_data = list()
-        symptom_subject_data = list()
-        for row in islice(objective_sheet.iter_rows(), 1, None):
-            public = (row[15].value or "").strip().lower()
-            if row[10].value.strip().lower() == settings.LZK_IMPORT_VALUE_TRUE.lower():
-                # Symptom
-                symptom_data.append(
-                    {
-                        "pk": row[0].value,
-                        "name": row[1].value.strip(),
-                        "public": public == settings.LZK_IMPORT_VALUE_TRUE.lower(),
-                    }
-                )
-                # Subjects
-                if row[7].value:
-                    for s in filter(
-                        bool, map(lambda s: s.strip(), row[7].value.split(","))
-                    ):
-                        if s.upper() not in subject_data:
-                            subject_data[s.upper()] = {
-                                "name": acronyms.get(s.upper(), s)
-                            }
-                        symptom_subject_data.append(
-                            {"symptom_id": row[0].value, "subject_id": s.upper()}
-                        )
-            elif bool(row[11].value):
-                # Competence levels
-                if row[3].value and row[6].value:
-                    cl = row[3].value.strip()
-                    if cl.upper() not in cl_data:
-                        cl_data[cl.upper()] = {
-                            "name": acronyms.get(cl.upper(), cl),
-                        }
-                    act = row[6].value.strip()
-                    if act not in activity_data:
-                        activity_data[act] = cl.upper()
-                    skill_data.append(
-                        {
-                            "pk": row[0].value,
-                            "name": row[1].value.strip(),
-                            "clinical_traineeship_checklist": row[12]
-                            .value.strip()
-                            .lower()
-                            == settings.LZK_IMPORT_VALUE_TRUE.lower()
-                            if row[12].value
-                            else False,
-                        }
-                    )
-                    skill_activity_map[row[0].value] = act
-            else:
-                # Role model
-                if row[14].value:
-                    rm = row[14].value.strip()
-                    if rm.upper() not in role_model_data:
-                        role_model_data[rm.upper()] = {
-                            "name": acronyms.get(rm.upper(), rm)
-                        }
-                else:
-                    rm = None
-
-                # Ability
-                ability_data.append(
-                    {
-                        "pk": row[0].value,
-                        "name": row[1].value.strip(),
-                        "depth": row[2].value,
-                        "subject_related": row[9].value.strip().lower()
-                        == settings.LZK_IMPORT_VALUE_TRUE.lower(),
-                        "public": public == settings.LZK_IMPORT_VALUE_TRUE.lower(),
-                        "rolemodel_id": rm,
-                    }
-                )
-                # Levels
-                if row[3].value:
-                    for l in map(lambda l: l.strip(), row[3].value.split(",")):
-                        if l.upper() not in level_data:
-                            level_data[l.upper()] = {"name": acronyms.get(l.upper(), l)}
-                        ability_level_data.append(
-                            {"ability_id": row[0].value, "level_id": l.upper()}
-                        )
-                # Subjects
-                if row[7].value:
-                    for s in filter(
-                        bool, map(lambda s: s.strip(), row[7].value.split(","))
-                    ):
-                        if s.upper() not in subject_data:
-                            subject_data[s.upper()] = {
-                                "name": acronyms.get(s.upper(), s)
-                            }
-                        ability_subject_data.append(
-                            {"ability_id": row[0].value, "subject_id": s.upper()}
-                        )
-                # Systems
-                if row[13].value:
-                    for s in map(lambda s: s.strip(), row[13].value.split(",")):
-                        if s.upper() not in system_data:
-                            system_data[s.upper()] = {
-                                "name": acronyms.get(s.upper(), s)
-                            }
-                        ability_system_data.append(
-                            {"ability_id": row[0].value, "system_id": s.upper()}
-                        )
-                # UFIDs
-                if row[17].value:
-                    if isinstance(row[17].value, int):
-                        values = [row[17].value]
-                    elif isinstance(row[17].value, float):
-                        values = map(
-                            lambda u: int(u.strip()),
-                            filter(bool, str(row[17].value).split(".")),
-                        )
-                    else:
-                        values = map(
-                            lambda u: int(u.strip()),
-                            filter(bool, row[17].value.split(",")),
-                        )
-                    for u in values:
-                        ability_ufid_data.append(
-                            {"ability_id": row[0].value, "ufid_id": u}
-                        )
-                # Study field
-                if row[18].value:
-                    sf = row[18].value.strip()
-                    if sf.upper() not in study_field_data:
-                        study_field_data[sf.upper()] = {
-                            "name": acronyms.get(sf.upper(), sf)
-                        }
-                    ability_study_field_data[row[0].value] = sf.upper()
-
-        models.StudyField.objects.on_conflict(
-            ["pk"], ConflictAction.UPDATE
-        ).bulk_insert(({**v, **{"pk": k}} for k, v in study_field_data.items()))
-
-        models.RoleModel.objects.on_conflict(["pk"], ConflictAction.UPDATE).bulk_insert(
-            ({**v, **{"pk": k}} for k, v in role_model_data.items())
-        )
 
-        ability_data_update = [
-            {
-                **o,
-                **{
-                    "study_field_id": ability_study_field_data.get(o.get("pk")),
-                },
-            }
-            for o in ability_data
-            if o.get("pk") in ability_study_field_data
-        ]
+class ImportDetailView(LoginRequiredMixin, SuperuserRequiredMixin, DetailView):
+    model = models.ImportJob
+    template_name = "LZK/private/import/detail.html"
+    extra_context = {"phases": importer.Importer.PHASES}
 
-        for k, v in cl_data.items():
-            models.CompetenceLevel.objects.get_or_create(pk=k, defaults=v)
 
-        models.Activity.objects.on_conflict(
-            ["name"], ConflictAction.UPDATE
-        ).bulk_insert(
-            ({"name": k, "competence_level_id": v} for k, v in activity_data.items())
-        )
-        activities_pk = {a.name: a.pk for a in models.Activity.objects.all()}
+class ImportHistoryView(LoginRequiredMixin, SuperuserRequiredMixin, ListView):
+    model = models.ImportRun
+    paginate_by = 50
+    template_name = "LZK/private/import/history.html"
+    extra_context = {"phases": importer.Importer.PHASES}
 
-        skill_data_update = [
-            {
-                **s,
-                **{
-                    "activity_id": activities_pk.get(
-                        skill_activity_map.get(s.get("pk"))
-                    ),
-                },
-            }
-            for s in skill_data
-            if s.get("pk") in skill_activity_map
+    def get_queryset(self):
+        return super().get_queryset().select_related("user", "job")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Timings in the order of the phases, JSON objects are not ordered.
+        context["runs"] = [
+            (
+                run,
+                [
+                    run.timings.get(phase)
+                    for phase, label in self.extra_context["phases"]
+                ],
+            )
+            for run in context["object_list"]
         ]
+        return context
 
-        models.Skill.objects.on_conflict(["pk"], ConflictAction.UPDATE).bulk_insert(
-            skill_data_update
-        )
-
-        objs = models.Ability.objects.on_conflict(
-            ["pk"], ConflictAction.UPDATE
-        ).bulk_insert(ability_data_update)
-        # models.Ability.subjects.through.objects.filter(
-        #    ability__pk__in=pks
-        # ).delete()
-
-        syms = models.Symptom.objects.on_conflict(
-            ["pk"], ConflictAction.UPDATE
-        ).bulk_insert(symptom_data)
-        # models.Symptom.subjects.through.objects.filter(
-        #    symptom__pk__in=pks
-        # ).delete()
-
-        models.Subject.objects.on_conflict(["pk"], ConflictAction.UPDATE).bulk_insert(
-            ({**v, **{"pk": k}} for k, v in subject_data.items())
-        )
 
-        with postgres_manager(models.Ability.subjects.through) as manager:
-            manager.get_queryset().on_conflict(
-                ["ability_id", "subject_id"], ConflictAction.UPDATE
-            ).bulk_insert(ability_subject_data)
+class ImportResumeView(
+    LoginRequiredMixin, SuperuserRequiredMixin, SingleObjectMixin, View
+):
+    model = models.ImportJob
 
-        with postgres_manager(models.Symptom.subjects.through) as manager:
-            manager.get_queryset().on_conflict(
-                ["symptom_id", "subject_id"], ConflictAction.UPDATE
-            ).bulk_insert(symptom_subject_data)
+    def post(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.resumable():
+            job.status = models.ImportJob.QUEUED
+            job.error = ""
+            job.report = []
+            job.save(update_fields=["status", "error", "report", "modified"])
+            transaction.on_commit(lambda: jobs.enqueue(job))
+        return HttpResponseRedirect(job.get_absolute_url())
+
+
+class ImportStatusView(
+    LoginRequiredMixin, SuperuserRequiredMixin, SingleObjectMixin, View
+):
+    model = models.ImportJob
 
-        models.Level.objects.on_conflict(["pk"], ConflictAction.UPDATE).bulk_insert(
-            ({**v, **{"pk": k}} for k, v in level_data.items())
-        )
-        models.System.objects.on_conflict(["pk"], ConflictAction.UPDATE).bulk_insert(
-            ({**v, **{"pk": k}} for k, v in system_data.items())
+    def get(self, request, *args, **kwargs):
+        obj = self.get_object()
+        phase, progress = jobs.live_progress(obj)
+        return JsonResponse(
+            {
+                "status": obj.status,
+                "ahead": obj.ahead() if obj.status in obj.ACTIVE else 0,
+                "phase": phase,
+                "progress": progress,
+                "stats": obj.stats,
+                "error": obj.error,
+            }
         )
 
-        # models.Ability.levels.through.objects.filter(
-        #    ability__pk__in=pks
-        # ).delete()
-        with postgres_manager(models.Ability.levels.through) as manager:
-            manager.get_queryset().on_conflict(
-                ["ability_id", "level_id"], ConflictAction.UPDATE
-            ).bulk_insert(ability_level_data)
-
-        # models.Ability.systems.through.objects.filter(
-        #    ability__pk__in=pks
-        # ).delete()
-        with postgres_manager(models.Ability.systems.through) as manager:
-            manager.get_queryset().on_conflict(
-                ["ability_id", "system_id"], ConflictAction.UPDATE
-            ).bulk_insert(ability_system_data)
-
-        # models.Ability.ufids.through.objects.filter(
-        #    ability__pk__in=pks
-        # ).delete()
-        with postgres_manager(models.Ability.ufids.through) as manager:
-            manager.get_queryset().on_conflict(
-                ["ability_id", "ufid_id"], ConflictAction.UPDATE
-            ).bulk_insert(ability_ufid_data)
-
-        return super().form_valid(form)
-
 
 class ListAbilityView(LoginRequiredMixin, ListView):
     model = models.Ability
@@ -3,19 +3,42 @@ from haystack import indexes
 from . import models
 
 
-class AbilityIndex(indexes.SearchIndex, indexes.Indexable):
+class RelatedSearchIndex(indexes.SearchIndex):
+    """
+    Search index declaring the related objects its document template uses,
+    which are fetched with each batch of objects to index instead of one
+    query per object. Changes to the many-to-many relations among them
+    reindex the objects, see `LZK.haystack.SignalProcessor`.
+    """
+
+    select_related = ()
+    prefetch_related = ()
+
+    def filter_queryset(self, queryset):
+        return queryset
+
+    def index_queryset(self, using=None):
+        queryset = self.filter_queryset(self.get_model().objects.all())
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        return queryset.prefetch_related(*self.prefetch_related)
+
+
+class AbilityIndex(RelatedSearchIndex, indexes.Indexable):
     text = indexes.CharField(document=True, use_template=True)
     # subjects = indexes.CharField(model_attr='subject')
     # pub_date = indexes.DateTimeField(model_attr='pub_date')
 
+    prefetch_related = ("levels", "subjects")
+
     def get_model(self):
         return models.Ability
 
-    def index_queryset(self, using=None):
-        return self.get_model().objects.exclude(depth=None).filter(public=True)
+    def filter_queryset(self, queryset):
+        return queryset.exclude(depth=None).filter(public=True)
 
 
-class SymptomIndex(indexes.SearchIndex, indexes.Indexable):
+class SymptomIndex(RelatedSearchIndex, indexes.Indexable):
     text = indexes.CharField(document=True, use_template=True)
     # subjects = indexes.CharField(model_attr='subject')
     # pub_date = indexes.DateTimeField(model_attr='pub_date')
@@ -23,11 +46,11 @@ class SymptomIndex(indexes.SearchIndex, indexes.Indexable):
     def get_model(self):
         return models.Symptom
 
-    def index_queryset(self, using=None):
-        return self.get_model().objects.filter(public=True)
+    def filter_queryset(self, queryset):
+        return queryset.filter(public=True)
 
 
-class ActivityIndex(indexes.SearchIndex, indexes.Indexable):
+class ActivityIndex(RelatedSearchIndex, indexes.Indexable):
     text = indexes.CharField(document=True, use_template=True)
     # subjects = indexes.CharField(model_attr='subject')
     # pub_date = indexes.DateTimeField(model_attr='pub_date')
@@ -35,17 +58,11 @@ class ActivityIndex(indexes.SearchIndex, indexes.Indexable):
     def get_model(self):
         return models.Activity
 
-    def index_queryset(self, using=None):
-        return self.get_model().objects.all()
-
 
-class SkillIndex(indexes.SearchIndex, indexes.Indexable):
+class SkillIndex(RelatedSearchIndex, indexes.Indexable):
     text = indexes.CharField(document=True, use_template=True)
     # subjects = indexes.CharField(model_attr='subject')
     # pub_date = indexes.DateTimeField(model_attr='pub_date')
 
     def get_model(self):
         return models.Skill
-
-    def index_queryset(self, using=None):
-        return self.get_model().objects.all()
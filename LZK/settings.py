@@ -59,6 +59,7 @@ INSTALLED_APPS = [
     "analytical",
     "rest_framework",
     "django_filters",
+    "django_rq",
     "debug_toolbar",
 ]
 
@@ -180,9 +181,13 @@ HAYSTACK_CONNECTIONS = {
     #    'ENGINE': 'xapian_backend.XapianEngine',
     #    'PATH': os.path.join(os.path.dirname(__file__), 'xapian_index'),
     # },
+    # "default": {
+    #     "ENGINE": "haystack.backends.whoosh_backend.WhooshEngine",
+    #     "PATH": os.path.join(BASE_DIR, "index"),
+    # },
     "default": {
-        "ENGINE": "haystack.backends.whoosh_backend.WhooshEngine",
-        "PATH": os.path.join(BASE_DIR, "index"),
+        "ENGINE": "LZK.haystack.PostgresEngine",
+        "CONFIGS": ("german", "english"),
     },
 }
 HAYSTACK_SIGNAL_PROCESSOR = "LZK.haystack.SignalProcessor"
@@ -1,3 +1,21 @@
 $(function() {
   $('[data-toggle="tooltip"]').tooltip();
+
+  $('[data-autocomplete]').each(function() {
+    var input = $(this);
+    var list = $('<datalist>').attr('id', this.id + '-autocomplete');
+    var timeout;
+    input.attr('list', list.attr('id')).after(list);
+    input.on('input', function() {
+      clearTimeout(timeout);
+      timeout = setTimeout(function() {
+        $.getJSON(input.data('autocomplete'), {q: input.val()}, function(data) {
+          list.empty();
+          $.each(data.results, function(i, result) {
+            $('<option>').attr('value', result.name).appendTo(list);
+          });
+        });
+      }, 200);
+    });
+  });
 });
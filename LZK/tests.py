@@ -1,3 +1,266 @@
+from io import BytesIO
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook
+
+from . import models
+from .indexing import update_index
+from .private.conf import settings
+from .private.importer import Importer
+from .private.sources import Workbook as WorkbookSource
+
+
+class IndexQuerysetTest(TestCase):
+    def create_abilities(self, count):
+        levels = [
+            models.Level.objects.create(id=f"L{i}", name=f"Level {i}") for i in range(3)
+        ]
+        subjects = [
+            models.Subject.objects.create(id=f"S{i}", name=f"Subject {i}")
+            for i in range(3)
+        ]
+        pks = set()
+        for i in range(count):
+            ability = models.Ability.objects.create(
+                name=f"Ability {i}", depth=1, subject_related=False, public=True
+            )
+            ability.levels.set(levels)
+            ability.subjects.set(subjects)
+            pks.add(ability.pk)
+        return pks
+
+    def test_queries_per_batch(self):
+        """
+        Reindexing a batch of abilities runs the same number of queries no
+        matter how many abilities it contains.
+        """
+        pks = sorted(self.create_abilities(20))
+        with CaptureQueriesContext(connection) as small:
+            update_index({models.Ability: set(pks[:2])}, dict())
+        with CaptureQueriesContext(connection) as large:
+            update_index({models.Ability: set(pks)}, dict())
+        self.assertEqual(len(small), len(large))
+        # The abilities, their levels and subjects and the index update.
+        self.assertLessEqual(len(large), 4)
+
+
+class SignalProcessorTest(TestCase):
+    def create_symptoms(self, count):
+        return {
+            models.Symptom.objects.create(name=f"Symptom {i}", public=True).pk
+            for i in range(count)
+        }
+
+    @mock.patch("LZK.haystack.update_index")
+    def test_batch_on_commit(self, update_index):
+        """
+        Objects saved in a transaction are indexed in one batch once it
+        commits.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                pks = self.create_symptoms(3)
+            update_index.assert_not_called()
+        update_index.assert_called_once_with({models.Symptom: pks}, {})
+
+    @mock.patch("LZK.haystack.update_index")
+    def test_rollback(self, update_index):
+        """
+        Nothing is indexed when the transaction is rolled back.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.create_symptoms(3)
+                transaction.set_rollback(True)
+        update_index.assert_not_called()
+
+
+class ImportTest(TestCase):
+    def objective(self, pk, name, **cells):
+        row = [None] * 19
+        row[0], row[1] = pk, name
+        row[15] = settings.LZK_IMPORT_VALUE_TRUE
+        for column, value in cells.items():
+            row[int(column[1:])] = value
+        return row
+
+    def ability(self, pk, name, subjects):
+        return self.objective(
+            pk,
+            name,
+            c2=1,
+            c3="L1",
+            c7=subjects,
+            c9=settings.LZK_IMPORT_VALUE_FALSE,
+            c14="ME",
+            c17="1",
+            c18="HM",
+        )
+
+    def workbook(self, objectives):
+        wb = Workbook(write_only=True)
+        acronyms = wb.create_sheet(settings.LZK_IMPORT_SHEET_ACRONYMS)
+        acronyms.append(["Subject one", "SUB1"])
+        acronyms.append(["Subject two", "SUB2"])
+        ufids = wb.create_sheet(settings.LZK_IMPORT_SHEET_UFIDS)
+        ufids.append(["Ebene 1", "Ebene 2", "UFID", "Bezeichnung"])
+        ufids.append([None, None, 1, "UFID 1"])
+        sheet = wb.create_sheet(settings.LZK_IMPORT_SHEET_OBJECTIVES)
+        sheet.append([f"Spalte {i}" for i in range(1, 20)])
+        for row in objectives:
+            sheet.append(row)
+        output = BytesIO()
+        wb.save(output)
+        return output.getvalue()
+
+    def run_import(self, content, **kwargs):
+        with WorkbookSource(BytesIO(content)) as source:
+            return Importer(source, **kwargs).run()
+
+    def setUp(self):
+        self.first = self.workbook(
+            [
+                self.ability(1, "Ability 1", "SUB1, SUB2"),
+                self.ability(2, "Ability 2", "SUB1"),
+                self.objective(
+                    3, "Symptom 3", c7="SUB1", c10=settings.LZK_IMPORT_VALUE_TRUE
+                ),
+            ]
+        )
+        self.stats = self.run_import(self.first)
+
+    def test_initial_import(self):
+        self.assertEqual(
+            self.stats["LZK.ability"],
+            {"inserted": 2, "changed": 0, "unchanged": 0, "deleted": 0},
+        )
+        self.assertEqual(
+            set(models.Ability.objects.values_list("pk", "name")),
+            {(1, "Ability 1"), (2, "Ability 2")},
+        )
+        self.assertEqual(
+            set(
+                models.Ability.subjects.through.objects.values_list(
+                    "ability_id", "subject_id"
+                )
+            ),
+            {(1, "SUB1"), (1, "SUB2"), (2, "SUB1")},
+        )
+        self.assertEqual(models.Ability.objects.get(pk=1).rolemodel_id, "ME")
+        self.assertEqual(models.Subject.objects.get(pk="SUB2").name, "Subject two")
+
+    def test_unchanged_workbook(self):
+        """
+        Importing the same workbook again is skipped without writing.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            stats = self.run_import(self.first)
+        self.assertEqual(stats, {})
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]["sql"].startswith("SELECT"))
+
+    def second(self):
+        """
+        The first workbook without ability 2 and a subject of ability 1, and
+        with symptom 3 renamed.
+        """
+        return self.workbook(
+            [
+                self.ability(1, "Ability 1", "SUB1"),
+                self.objective(
+                    3, "Symptom three", c7="SUB1", c10=settings.LZK_IMPORT_VALUE_TRUE
+                ),
+            ]
+        )
+
+    def test_delta_import(self):
+        """
+        Removed rows are unpublished, removed links deleted, changed rows
+        updated and the others left alone.
+        """
+        stats = self.run_import(self.second())
+        self.assertEqual(
+            stats["LZK.ability"],
+            {"inserted": 0, "changed": 1, "unchanged": 0, "deleted": 1},
+        )
+        self.assertEqual(
+            stats["LZK.symptom"],
+            {"inserted": 0, "changed": 1, "unchanged": 0, "deleted": 0},
+        )
+        self.assertEqual(
+            stats["LZK.ability_subjects"],
+            {"inserted": 0, "changed": 0, "unchanged": 0, "deleted": 1},
+        )
+        self.assertEqual(
+            stats["LZK.ufid"],
+            {"inserted": 0, "changed": 0, "unchanged": 1, "deleted": 0},
+        )
+        self.assertEqual(
+            list(models.Ability.objects.values_list("pk", "name", "public")),
+            [(1, "Ability 1", True), (2, "Ability 2", False)],
+        )
+        self.assertEqual(
+            set(
+                models.Ability.subjects.through.objects.values_list(
+                    "ability_id", "subject_id"
+                )
+            ),
+            {(1, "SUB1"), (2, "SUB1")},
+        )
+        self.assertEqual(models.Symptom.objects.get(pk=3).name, "Symptom three")
+        self.assertEqual(
+            list(
+                models.Symptom.subjects.through.objects.values_list(
+                    "symptom_id", "subject_id"
+                )
+            ),
+            [(3, "SUB1")],
+        )
+        self.assertFalse(
+            models.ImportDigest.objects.filter(model="LZK.ability", key="2").exists()
+        )
+
+    def test_missing_rows_keep_comments(self):
+        """
+        Comments on rows missing from a workbook are kept, the rows are
+        published again when they reappear.
+        """
+        feedback = models.Feedback.objects.create(
+            university=models.University.objects.create(
+                name="University", url="https://example.com", logo="logo.svg"
+            ),
+            notes="",
+        )
+        comment = models.AbilityComment.objects.create(
+            feedback=feedback, ability_id=2, comment="Comment"
+        )
+        self.run_import(self.second())
+        self.assertTrue(models.AbilityComment.objects.filter(pk=comment.pk).exists())
+        self.run_import(self.first)
+        self.assertTrue(models.Ability.objects.get(pk=2).public)
+        self.assertTrue(models.AbilityComment.objects.filter(pk=comment.pk).exists())
 
-# Create your tests here.
+    def test_delete_requires_force(self):
+        """
+        Deleting more than `LZK_IMPORT_MAX_DELETED` of the rows of a model
+        without a public flag requires `force`.
+        """
+        skill = self.objective(
+            4,
+            "Skill 4",
+            c3="CL1",
+            c6="Activity 1",
+            c11="x",
+            c12=settings.LZK_IMPORT_VALUE_FALSE,
+        )
+        self.run_import(self.workbook([self.ability(1, "Ability 1", "SUB1"), skill]))
+        with self.assertRaises(ValidationError):
+            self.run_import(self.second())
+        self.assertTrue(models.Skill.objects.filter(pk=4).exists())
+        stats = self.run_import(self.second(), force=True)
+        self.assertEqual(stats["LZK.skill"]["deleted"], 1)
+        self.assertFalse(models.Skill.objects.filter(pk=4).exists())
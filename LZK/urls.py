@@ -40,6 +40,7 @@ urlpatterns = [
     path("", views.IndexView.as_view(), name="index"),
     path("about/", views.AboutView.as_view(), name="about"),
     path("search/", views.SearchView.as_view(), name="search"),
+    path("autocomplete/", views.AutocompleteView.as_view(), name="autocomplete"),
     path(
         "abilities/filtered/<str:payload>",
         views.AbilityFilteredView.as_view(),
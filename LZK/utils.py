@@ -1,11 +1,24 @@
 import json
 from base64 import urlsafe_b64encode
+from itertools import islice
 from pathlib import PurePosixPath
 from uuid import uuid4
 
 from django.db import models
 
 
+def chunked(iterable, size):
+    """
+    Split an iterable into lists of at most `size` items.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
 class Uuid4Upload(str):
     def __new__(cls, instance, filename):
         f = PurePosixPath(filename)
@@ -86,15 +86,20 @@ class XlsxFileValidator:
         """
         try:
             wb = load_workbook(value, read_only=True, keep_links=False, data_only=True)
-            if self.sheets:
-                for s in self.sheets:
-                    try:
-                        wb.get_sheet_by_name(s)
-                    except KeyError as e:
-                        raise ValidationError(
-                            _("Document does not contain a sheet named {s}.").format(
-                                s=s
-                            )
-                        ) from e
         except (BadZipFile, InvalidFileException) as e:
             raise ValidationError(_("File is no a valid XLS document.")) from e
+        try:
+            self.check(wb)
+        finally:
+            wb.close()
+
+    def check(self, wb):
+        """
+        Scan a loaded workbook for the required sheets.
+        """
+        if self.sheets:
+            for s in self.sheets:
+                if s not in wb.sheetnames:
+                    raise ValidationError(
+                        _("Document does not contain a sheet named {s}.").format(s=s)
+                    )
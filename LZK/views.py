@@ -1,3 +1,4 @@
+import hashlib
 import json
 import logging
 
@@ -6,12 +7,20 @@ from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout
 from cryptography.fernet import Fernet, InvalidToken
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
 from django.db.models import Count, Q
-from django.http import Http404
+from django.http import Http404, JsonResponse
 from django.urls import reverse_lazy as reverse
 from django.utils import timezone
 from django.utils.translation import gettext as _
-from django.views.generic import DetailView, ListView, TemplateView, UpdateView
+from django.views.generic import (
+    DetailView,
+    ListView,
+    TemplateView,
+    UpdateView,
+    View,
+)
 from django.views.generic.detail import SingleObjectMixin
 from django_filters.views import FilterMixin, FilterView
 from django_tables2.views import SingleTableMixin
@@ -482,6 +491,59 @@ class SearchView(BaseSearchView):
     results_per_page = 10
 
 
+class AutocompleteView(View):
+    """
+    Names of public abilities, symptoms and skills containing the query `q`
+    as JSON, most similar first, for typeahead in the filters.
+
+    The `type` parameter limits the suggestions to some of `types`. The
+    `icontains` lookups compare `UPPER(name)`, which has trigram indexes.
+    Results are cached by query.
+    """
+
+    types = {
+        "abilities": models.Ability.objects.filter(public=True),
+        "symptoms": models.Symptom.objects.filter(public=True),
+        "skills": models.Skill.objects.all(),
+    }
+
+    def get(self, request, *args, **kwargs):
+        query = " ".join(request.GET.get("q", "").split()).lower()
+        types = [t for t in self.types if t in request.GET.getlist("type", self.types)]
+        if len(query) < settings.LZK_AUTOCOMPLETE_MIN_LENGTH or not types:
+            return JsonResponse({"results": []})
+        digest = hashlib.sha1(json.dumps([query, types]).encode("utf-8"))
+        key = f"LZK:autocomplete:{digest.hexdigest()}"
+        results = cache.get(key)
+        if results is None:
+            results = self.complete(query, types)
+            cache.set(key, results, settings.LZK_AUTOCOMPLETE_TIMEOUT)
+        return JsonResponse({"results": results})
+
+    def complete(self, query, types):
+        limit = settings.LZK_AUTOCOMPLETE_LIMIT
+        matches = []
+        for type in types:
+            qs = (
+                self.types[type]
+                .filter(name__icontains=query)
+                .annotate(similarity=TrigramSimilarity("name", query))
+                .order_by("-similarity", "name")
+                .only("name")
+            )
+            matches.extend((type, obj) for obj in qs[:limit])
+        matches.sort(key=lambda m: (-m[1].similarity, m[1].name))
+        return [
+            {
+                "type": type,
+                "id": obj.pk,
+                "name": obj.name,
+                "url": obj.get_absolute_url(),
+            }
+            for type, obj in matches[:limit]
+        ]
+
+
 class SkillViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = models.Skill.objects.all()
     serializer_class = serializers.SkillSerializer